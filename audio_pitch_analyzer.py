@@ -1,44 +1,584 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Tuple, Optional, List, Dict, Any
+import copy
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Tuple, Optional, List, Dict, Any, Iterator
 from pitch_detector import PitchDetector
 from audio_utils import AudioUtils
+import fast_audio
 import os
 
+# matplotlib 导入较慢，只在首次绘图时导入并缓存，
+# 仅做分析的调用方（如进程池中的子进程）无需承担这部分开销
+_pyplot = None
+
+
+def _get_pyplot():
+    """
+    延迟导入并缓存 matplotlib.pyplot 模块
+    
+    Returns:
+        module: matplotlib.pyplot
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib.pyplot
+        _pyplot = matplotlib.pyplot
+    return _pyplot
+
+
+def _analyze_file_worker(init_kwargs: Dict[str, Any], file_path: str, method: str,
+                         start_time: Optional[str], end_time: Optional[str]) -> Dict[str, Any]:
+    """
+    在子进程中分析单个文件（进程池使用的顶层函数）
+    
+    Args:
+        init_kwargs: AudioPitchAnalyzer 的构造参数
+        file_path: 音频文件路径
+        method: 检测方法
+        start_time: 开始时间
+        end_time: 结束时间
+        
+    Returns:
+        Dict[str, Any]: 分析结果
+    """
+    analyzer = AudioPitchAnalyzer(**init_kwargs)
+    return analyzer.analyze_pitch(file_path, method=method,
+                                  start_time=start_time, end_time=end_time)
+
+
+def _analyze_pitch_on_disk(analyzer: 'AudioPitchAnalyzer', params: Dict[str, Any],
+                           file_path: str, method: str, start_time: Optional[str],
+                           end_time: Optional[str], mtime: float) -> Dict[str, Any]:
+    """
+    由 joblib.Memory 缓存到磁盘的分析函数
+    
+    analyzer 本身不参与缓存键，由 params（影响结果的构造参数）和 mtime 代替，
+    文件被修改后缓存自动失效。
+    
+    Args:
+        analyzer: 执行分析的分析器
+        params: 影响分析结果的构造参数
+        file_path: 音频文件路径
+        method: 检测方法
+        start_time: 开始时间
+        end_time: 结束时间
+        mtime: 文件修改时间
+        
+    Returns:
+        Dict[str, Any]: 分析结果
+    """
+    return analyzer._analyze_pitch_uncached(file_path, method, start_time, end_time)
+
+
+@dataclass(eq=False)
+class SegmentPitches:
+    """
+    有声片段的音调检测结果，按列存储
+    
+    下游通常只需要其中一列（如频率），按列存储可以直接得到数组。
+    迭代和下标访问仍返回每个片段的字典，与原先的列表格式兼容。
+    """
+    start_time: np.ndarray
+    end_time: np.ndarray
+    frequency: np.ndarray
+    confidence: np.ndarray
+    note: np.ndarray
+    
+    FIELDS = ('start_time', 'end_time', 'frequency', 'confidence', 'note')
+    
+    @classmethod
+    def from_columns(cls, start_time, end_time, frequency, confidence, note) -> 'SegmentPitches':
+        """
+        由各列数据构建
+        
+        Args:
+            start_time: 片段开始时间（秒）
+            end_time: 片段结束时间（秒）
+            frequency: 片段基音频率
+            confidence: 片段置信度
+            note: 片段音符名称
+            
+        Returns:
+            SegmentPitches: 片段音调结果
+        """
+        return cls(np.asarray(start_time, dtype=np.float64),
+                   np.asarray(end_time, dtype=np.float64),
+                   np.asarray(frequency, dtype=np.float64),
+                   np.asarray(confidence, dtype=np.float64),
+                   np.asarray(note, dtype=str))
+    
+    def __len__(self) -> int:
+        return len(self.frequency)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return {field: getattr(self, field)[index].item() for field in self.FIELDS}
+    
+    def __iter__(self):
+        return iter(self.to_dicts())
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SegmentPitches):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, field), getattr(other, field))
+                   for field in self.FIELDS)
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        转换为每个片段一个字典的列表（便于打印和JSON序列化）
+        
+        Returns:
+            List[Dict[str, Any]]: 片段列表
+        """
+        columns = [getattr(self, field).tolist() for field in self.FIELDS]
+        return [dict(zip(self.FIELDS, row)) for row in zip(*columns)]
+
+
+def _segment_frequencies(segments) -> np.ndarray:
+    """
+    取出片段的频率列，兼容 SegmentPitches 和字典列表两种格式
+    
+    Args:
+        segments: 片段音调结果
+        
+    Returns:
+        np.ndarray: 片段频率
+    """
+    if isinstance(segments, SegmentPitches):
+        return segments.frequency
+    return np.fromiter((seg['frequency'] for seg in segments), dtype=np.float64)
+
+
 class AudioPitchAnalyzer:
     """音频音调分析器主类"""
     
-    def __init__(self, sr: int = 22050, tolerance: float = 0.05):
+    # 预处理音频缓存的最大条目数（按最近使用淘汰）
+    AUDIO_CACHE_SIZE = 8
+    
+    # 分析结果缓存的最大条目数（按最近使用淘汰）
+    RESULT_CACHE_SIZE = 128
+    
+    # 波形图最多绘制的点数（约为图宽像素数的2倍）
+    WAVEFORM_POINTS = 4000
+    
+    # 频谱图最多绘制的帧数（约为子图宽度的像素数）
+    SPECTROGRAM_COLUMNS = 2000
+    
+    # 整体音调相差超过容差再加上该音分数时，跳过片段相似性分析
+    FAST_REJECT_MARGIN_CENTS = 200.0
+    
+    # 需要分析的文件数不少于该值时才默认使用进程池（文件太少时进程启动开销得不偿失）
+    PARALLEL_MIN_FILES = 3
+    
+    # 顺序分析时最多提前预取的文件数（已解码的音频在被取用前一直占用内存）
+    PREFETCH_AHEAD = 2
+    
+    def __init__(self, sr: int = 22050, tolerance: float = 0.05,
+                 max_segment_seconds: Optional[float] = 5.0,
+                 fmin: float = 80.0, fmax: float = 2000.0,
+                 pitch_sr: Optional[int] = None, cache_dir: Optional[str] = None):
         """
         初始化音调分析器
         
         Args:
             sr: 采样率
             tolerance: 音调比较容差（相对误差）
+            max_segment_seconds: 每个有声片段参与音调检测的最大时长（秒），
+                                 音调在局部是平稳的，更长的片段只会增加计算量；None表示不限制
+            fmin: 检测的最低频率（Hz）
+            fmax: 检测的最高频率（Hz）。默认范围兼顾人声与常见乐器；
+                  只分析语音时可收窄（如 65~1000Hz）以减少搜索的周期范围
+            pitch_sr: YIN和自相关方法使用的采样率（可选）。低于 sr 时先降采样再搜索周期，
+                      适合基频较低的语音（如 8000Hz）；频谱分析和可视化仍使用 sr
+            cache_dir: 分析结果的磁盘缓存目录（可选，需要joblib）。设置后跨进程、
+                       跨会话复用同一文件以相同参数得到的分析结果，
+                       预处理后的音频也缓存在其中的 audio 子目录
         """
+        if pitch_sr is not None and fmax >= pitch_sr / 2:
+            raise ValueError(f"pitch_sr={pitch_sr} 过低，无法检测到 fmax={fmax}Hz")
+        
         self.sr = sr
         self.tolerance = tolerance
-        self.pitch_detector = PitchDetector(sr=sr)
+        self.max_segment_seconds = max_segment_seconds
+        self.pitch_sr = pitch_sr
+        self.cache_dir = cache_dir
+        self.pitch_detector = PitchDetector(sr=sr, fmin=fmin, fmax=fmax)
+        # (file_path, sr, offset, duration) -> (y_processed, sr, 幅度谱或None)
+        self._audio_cache: 'OrderedDict[tuple, Tuple[np.ndarray, int, Optional[np.ndarray]]]' = OrderedDict()
+        # (file_path, method, start_time, end_time, sr, ..., mtime) -> 分析结果
+        self._result_cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()
+        
+        # 可视化使用的图表，按类型缓存并在后续调用中复用
+        self._figures: Dict[str, Any] = {}
+        
+        # 后台线程预先加载的音频：(file_path, sr, offset, duration) -> Future
+        self._prefetched: Dict[tuple, Future] = {}
+        
+        # 可选的磁盘缓存，未命中内存缓存时使用
+        self._disk_analyze = None
+        if cache_dir is not None:
+            from joblib import Memory
+            self._disk_analyze = Memory(cache_dir, verbose=0).cache(
+                _analyze_pitch_on_disk, ignore=['analyzer'])
+        
+        # 检测方法分发表：每个函数接收 (y, S=幅度谱, acf=自相关, y_lag=降采样信号, lag_sr=其采样率)
+        # 并返回 (频率, 置信度)
+        self._methods = {
+            'multi': self.pitch_detector.detect_pitch_multi_method,
+            'piptrack': partial(self._spectral_only, self.pitch_detector.detect_fundamental_frequency),
+            'yin': partial(self._with_fixed_confidence, self.pitch_detector.detect_pitch_yin, 0.8),
+            'autocorr': partial(self._with_fixed_confidence,
+                                self.pitch_detector.autocorrelation_pitch, 0.6),
+        }
+    
+    @staticmethod
+    def _spectral_only(detector, y: np.ndarray, S: Optional[np.ndarray] = None,
+                       acf: Optional[np.ndarray] = None, y_lag: Optional[np.ndarray] = None,
+                       lag_sr: Optional[int] = None) -> Tuple[float, float]:
+        """
+        包装只使用幅度谱的检测方法，忽略自相关和降采样信号
+        
+        Args:
+            detector: 检测函数，接收音频信号和幅度谱并返回 (频率, 置信度)
+            y: 音频信号
+            S: 预先计算的幅度谱（可选）
+            acf: 自相关（这类方法不使用）
+            y_lag: 降采样信号（这类方法不使用）
+            lag_sr: 降采样信号的采样率（这类方法不使用）
+            
+        Returns:
+            Tuple[float, float]: (基音频率, 置信度)
+        """
+        return detector(y, S=S)
+    
+    @staticmethod
+    def _with_fixed_confidence(detector, confidence: float, y: np.ndarray,
+                               S: Optional[np.ndarray] = None,
+                               acf: Optional[np.ndarray] = None,
+                               y_lag: Optional[np.ndarray] = None,
+                               lag_sr: Optional[int] = None) -> Tuple[float, float]:
+        """
+        包装只返回频率的检测方法，检测成功时给予固定置信度
+        
+        Args:
+            detector: 检测函数，接收音频信号并返回频率
+            confidence: 检测到有效频率时的置信度
+            y: 音频信号
+            S: 幅度谱（这类方法不使用）
+            acf: 预先计算的自相关（可选，须由 y_lag 计算）
+            y_lag: 降采样后的信号（可选，提供时代替 y 进行检测）
+            lag_sr: y_lag 的采样率
+            
+        Returns:
+            Tuple[float, float]: (基音频率, 置信度)
+        """
+        if y_lag is None:
+            y_lag = y
+        frequency = detector(y_lag, acf=acf, sr=lag_sr)
+        return frequency, (confidence if frequency > 0 else 0.0)
+    
+    def _lag_signal(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, int]:
+        """
+        返回供YIN和自相关方法使用的信号：设置了较低的 pitch_sr 时降采样，否则原样返回
+        
+        Args:
+            y: 预处理后的音频信号
+            sr: y 的采样率
+            
+        Returns:
+            Tuple[np.ndarray, int]: (信号, 采样率)
+        """
+        if self.pitch_sr and self.pitch_sr < sr:
+            return fast_audio.resample(y, sr, self.pitch_sr, quality='soxr_qq'), self.pitch_sr
+        return y, sr
+    
+    def _init_kwargs(self) -> Dict[str, Any]:
+        """
+        返回可在子进程中重建分析器的构造参数
         
+        Returns:
+            Dict[str, Any]: 构造参数
+        """
+        return {'sr': self.sr, 'tolerance': self.tolerance,
+                'max_segment_seconds': self.max_segment_seconds,
+                'fmin': self.pitch_detector.fmin, 'fmax': self.pitch_detector.fmax,
+                'pitch_sr': self.pitch_sr, 'cache_dir': self.cache_dir}
+    
+    def _cache_audio(self, key: tuple, y: np.ndarray, sr: int,
+                     S: Optional[np.ndarray] = None):
+        """
+        缓存预处理后的音频，超出容量时淘汰最久未使用的条目
+        
+        Args:
+            key: 缓存键 (file_path, sr, offset, duration)
+            y: 预处理后的音频信号
+            sr: 采样率
+            S: 分析时计算的幅度谱（可选）
+        """
+        self._audio_cache[key] = (y, sr, S)
+        self._audio_cache.move_to_end(key)
+        while len(self._audio_cache) > self.AUDIO_CACHE_SIZE:
+            self._audio_cache.popitem(last=False)
+    
+    def _get_cached_audio(self, key: tuple) -> Optional[Tuple[np.ndarray, int, Optional[np.ndarray]]]:
+        """
+        读取缓存的预处理音频
+        
+        Args:
+            key: 缓存键
+            
+        Returns:
+            Optional[Tuple[np.ndarray, int, Optional[np.ndarray]]]:
+                (预处理后的音频, 采样率, 幅度谱)，未命中时为None
+        """
+        cached = self._audio_cache.get(key)
+        if cached is not None:
+            self._audio_cache.move_to_end(key)
+        return cached
+        
+    def _load_processed(self, file_path: str, offset: float, duration: Optional[float],
+                        info: Optional[dict] = None) -> Tuple[np.ndarray, int, float]:
+        """
+        加载并预处理音频；设置了 cache_dir 时预处理结果同时缓存到磁盘
+        
+        Args:
+            file_path: 音频文件路径
+            offset: 开始时间偏移（秒）
+            duration: 加载时长（秒），None表示加载到结尾
+            info: 可选的字典，传入时写入音频文件信息
+            
+        Returns:
+            Tuple[np.ndarray, int, float]: (预处理后的音频, 采样率, 预处理前的音频时长（秒）)
+        """
+        # 已由 _prefetch_audio 在后台加载时直接取用
+        future = self._prefetched.pop((file_path, self.sr, offset, duration), None)
+        if future is not None:
+            y_processed, sr, raw_duration, audio_info = future.result()
+            if info is not None:
+                info.update(audio_info)
+            return y_processed, sr, raw_duration
+        
+        return self._read_processed(file_path, offset, duration, info)
+    
+    def _read_processed(self, file_path: str, offset: float, duration: Optional[float],
+                        info: Optional[dict] = None) -> Tuple[np.ndarray, int, float]:
+        """
+        从文件加载并预处理音频（不经过预取），参数与返回值同 _load_processed
+        """
+        if self.cache_dir is not None:
+            return AudioUtils.load_audio_cached(file_path, sr=self.sr, duration=duration,
+                                                offset=offset, info=info,
+                                                cache_dir=os.path.join(self.cache_dir, 'audio'))
+        
+        audio_info = {}
+        y, sr = AudioUtils.load_audio(file_path, sr=self.sr, duration=duration, offset=offset,
+                                      info=audio_info)
+        # 音频本身精度有限，整个数值路径统一使用float32以减少内存带宽
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        
+        # 加载时未能顺带读取音频信息（如非soundfile格式）时才单独获取
+        if info is not None:
+            info.update(audio_info or AudioUtils.get_audio_info(file_path))
+        
+        return AudioUtils.preprocess_audio(y, sr), sr, len(y) / sr
+    
+    def _prefetch_audio(self, executor: ThreadPoolExecutor, file_paths: List[str],
+                        method: str, start_time: Optional[str],
+                        end_time: Optional[str]) -> List[tuple]:
+        """
+        在线程池中预先加载并预处理尚无缓存结果的文件，使解码与音调检测重叠进行
+        
+        Args:
+            executor: 执行加载的线程池
+            file_paths: 音频文件路径列表（不含重复）
+            method: 随后使用的检测方法
+            start_time: 开始时间
+            end_time: 结束时间
+            
+        Returns:
+            List[tuple]: 登记的预取键，用完后由调用方清理
+        """
+        try:
+            offset, duration = self._parse_time_range(start_time, end_time)
+        except ValueError:
+            # 时间参数无效时由实际分析过程报告错误
+            return []
+        
+        keys = []
+        for file_path in file_paths:
+            result_key = self._result_key(file_path, method, start_time, end_time)
+            key = (file_path, self.sr, offset, duration)
+            if result_key is None or result_key in self._result_cache or key in self._prefetched:
+                continue
+            self._prefetched[key] = executor.submit(self._read_with_info, file_path,
+                                                    offset, duration)
+            keys.append(key)
+        return keys
+    
+    def _read_with_info(self, file_path: str, offset: float, duration: Optional[float]):
+        """
+        加载并预处理音频，同时返回音频信息（预取线程使用）
+        
+        Returns:
+            Tuple[np.ndarray, int, float, dict]: (预处理后的音频, 采样率, 预处理前的时长, 音频信息)
+        """
+        audio_info = {}
+        y_processed, sr, raw_duration = self._read_processed(file_path, offset, duration,
+                                                             info=audio_info)
+        return y_processed, sr, raw_duration, audio_info
+    
+    def _result_key(self, file_path: str, method: str, start_time: Optional[str],
+                    end_time: Optional[str]) -> Optional[tuple]:
+        """
+        返回分析结果的缓存键，包含文件修改时间；无法读取文件时返回None
+        
+        Args:
+            file_path: 音频文件路径
+            method: 检测方法
+            start_time: 开始时间
+            end_time: 结束时间
+            
+        Returns:
+            Optional[tuple]: 缓存键
+        """
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return None
+        return (file_path, method, start_time, end_time, self.sr,
+                self.tolerance, self.max_segment_seconds,
+                self.pitch_detector.fmin, self.pitch_detector.fmax, self.pitch_sr, mtime)
+    
     def analyze_pitch(self, file_path: str, method: str = 'multi', 
                      start_time: Optional[str] = None, 
                      end_time: Optional[str] = None) -> Dict[str, Any]:
         """
         分析音频文件的音调
         
+        同一文件以相同参数重复分析时直接返回缓存结果的副本；
+        缓存键包含文件修改时间，文件被修改后会自动重新分析。
+        
         Args:
             file_path: 音频文件路径
             method: 检测方法 ('multi', 'piptrack', 'yin', 'autocorr')
             start_time: 开始时间，支持格式 "1:30" 或 "90"
             end_time: 结束时间，支持格式 "1:30" 或 "90"
             
+        Returns:
+            Dict[str, Any]: 分析结果
+        """
+        key = self._result_key(file_path, method, start_time, end_time)
+        if key is None:
+            # 文件不存在等情况交给实际分析过程报告错误
+            return self._analyze_pitch_uncached(file_path, method, start_time, end_time)
+        mtime = key[-1]
+        
+        result = self._result_cache.get(key)
+        if result is None:
+            if self._disk_analyze is not None:
+                params = self._init_kwargs()
+                del params['cache_dir']
+                result = self._disk_analyze(self, params, file_path, method,
+                                            start_time, end_time, mtime)
+            else:
+                result = self._analyze_pitch_uncached(file_path, method, start_time, end_time)
+            self._result_cache[key] = result
+            while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+        else:
+            self._result_cache.move_to_end(key)
+            # 结果命中时同步刷新对应的音频缓存，使后续可视化尽量命中
+            self._get_cached_audio(result['_cache_key'])
+        
+        # 返回副本，调用方修改结果不会影响缓存
+        return copy.deepcopy(result)
+    
+    def _analyze_pitch_uncached(self, file_path: str, method: str,
+                                start_time: Optional[str],
+                                end_time: Optional[str]) -> Dict[str, Any]:
+        """
+        分析音频文件的音调（不经过结果缓存）
+        
+        Args:
+            file_path: 音频文件路径
+            method: 检测方法
+            start_time: 开始时间
+            end_time: 结束时间
+            
         Returns:
             Dict[str, Any]: 分析结果
         """
         if not AudioUtils.is_supported_format(file_path):
             raise ValueError(f"不支持的音频格式: {file_path}")
         
-        # 解析时间参数
+        self._get_detector(method)
+        offset, duration = self._parse_time_range(start_time, end_time)
+        
+        # 加载音频
+        time_info = ""
+        if start_time or end_time:
+            if start_time and end_time:
+                time_info = f" (从 {start_time} 到 {end_time})"
+            elif start_time:
+                time_info = f" (从 {start_time} 开始)"
+            elif end_time:
+                time_info = f" (到 {end_time} 结束)"
+        
+        print(f"正在分析: {os.path.basename(file_path)}{time_info}")
+        audio_info = {}
+        y_processed, sr, raw_duration = self._load_processed(file_path, offset, duration,
+                                                             info=audio_info)
+        
+        return self._analyze_processed(y_processed, sr, raw_duration, audio_info, method,
+                                       file_path, start_time, end_time, offset, duration)
+    
+    def analyze_pitch_array(self, y: np.ndarray, sr: int, method: str = 'multi',
+                            file_path: Optional[str] = None,
+                            start_time: Optional[str] = None,
+                            end_time: Optional[str] = None,
+                            audio_info: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        分析已加载到内存中的音频（跳过文件加载步骤）
+        
+        Args:
+            y: 音频信号（已截取到需要分析的时间范围，未经预处理）
+            sr: y 的采样率，与分析器采样率不同时先重采样
+            method: 检测方法 ('multi', 'piptrack', 'yin', 'autocorr')
+            file_path: 音频来源的文件路径（可选，仅记录在结果中；提供时可视化可复用缓存的音频）
+            start_time: y 在原音频中的开始时间（可选，仅记录在结果中）
+            end_time: y 在原音频中的结束时间（可选，仅记录在结果中）
+            audio_info: 音频文件信息（可选，仅记录在结果中）
+            
+        Returns:
+            Dict[str, Any]: 分析结果，格式与 analyze_pitch 相同
+        """
+        self._get_detector(method)
+        offset, duration = self._parse_time_range(start_time, end_time)
+        
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        if sr != self.sr:
+            y = fast_audio.resample(y, sr, self.sr)
+            sr = self.sr
+        y_processed = AudioUtils.preprocess_audio(y, sr)
+        
+        return self._analyze_processed(y_processed, sr, len(y) / sr, dict(audio_info or {}),
+                                       method, file_path, start_time, end_time, offset, duration)
+    
+    @staticmethod
+    def _parse_time_range(start_time: Optional[str],
+                          end_time: Optional[str]) -> Tuple[float, Optional[float]]:
+        """
+        把开始/结束时间解析为加载音频使用的 offset 和 duration
+        
+        Args:
+            start_time: 开始时间，支持格式 "1:30" 或 "90"
+            end_time: 结束时间，支持格式 "1:30" 或 "90"
+            
+        Returns:
+            Tuple[float, Optional[float]]: (offset秒数, duration秒数或None)
+        """
         offset = 0.0
         duration = None
         
@@ -55,38 +595,67 @@ class AudioPitchAnalyzer:
             if duration <= 0:
                 raise ValueError("结束时间必须大于开始时间")
         
-        # 加载音频
-        time_info = ""
-        if start_time or end_time:
-            if start_time and end_time:
-                time_info = f" (从 {start_time} 到 {end_time})"
-            elif start_time:
-                time_info = f" (从 {start_time} 开始)"
-            elif end_time:
-                time_info = f" (到 {end_time} 结束)"
+        return offset, duration
+    
+    def _get_detector(self, method: str):
+        """
+        返回检测方法对应的分发函数
         
-        print(f"正在分析: {os.path.basename(file_path)}{time_info}")
-        y, sr = AudioUtils.load_audio(file_path, sr=self.sr, duration=duration, offset=offset)
+        Args:
+            method: 检测方法
+            
+        Returns:
+            callable: 检测函数
+        """
+        detect = self._methods.get(method)
+        if detect is None:
+            raise ValueError(f"未知的检测方法: {method}")
+        return detect
+    
+    def _analyze_processed(self, y_processed: np.ndarray, sr: int, raw_duration: float,
+                           audio_info: dict, method: str, file_path: Optional[str],
+                           start_time: Optional[str], end_time: Optional[str],
+                           offset: float, duration: Optional[float]) -> Dict[str, Any]:
+        """
+        对预处理后的音频检测整体音调和各有声片段的音调
         
-        # 预处理
-        y_processed = AudioUtils.preprocess_audio(y, sr)
+        Args:
+            y_processed: 预处理后的音频信号
+            sr: 采样率
+            raw_duration: 预处理前的音频时长（秒）
+            audio_info: 音频文件信息
+            method: 检测方法
+            file_path: 音频文件路径（可选）
+            start_time: 开始时间
+            end_time: 结束时间
+            offset: 开始时间偏移（秒）
+            duration: 加载时长（秒）
+            
+        Returns:
+            Dict[str, Any]: 分析结果
+        """
+        detect = self._get_detector(method)
+        
+        # piptrack需要的幅度谱只计算一次，并与可视化共享
+        S = None
+        if method in ('multi', 'piptrack'):
+            S = self.pitch_detector.compute_spectrogram(y_processed)
+        
+        # YIN和自相关在时域搜索周期，可使用降采样后的信号以缩小延迟搜索范围
+        y_lag, lag_sr = self._lag_signal(y_processed, sr)
+        
+        # 自相关同样只通过一次FFT计算，供自相关方法（包括multi中的自相关）复用
+        acf = None
+        if method in ('multi', 'autocorr'):
+            acf = self.pitch_detector.compute_autocorrelation(y_lag)
         
-        # 获取音频信息
-        audio_info = AudioUtils.get_audio_info(file_path)
+        # 缓存预处理结果，供可视化复用（没有来源文件的内存音频无法稳定标识，不缓存）
+        cache_key = (file_path, self.sr, offset, duration)
+        if file_path is not None:
+            self._cache_audio(cache_key, y_processed, sr, S)
         
         # 检测音调
-        if method == 'multi':
-            frequency, confidence = self.pitch_detector.detect_pitch_multi_method(y_processed)
-        elif method == 'piptrack':
-            frequency, confidence = self.pitch_detector.detect_fundamental_frequency(y_processed)
-        elif method == 'yin':
-            frequency = self.pitch_detector.detect_pitch_yin(y_processed)
-            confidence = 0.8 if frequency > 0 else 0.0
-        elif method == 'autocorr':
-            frequency = self.pitch_detector.autocorrelation_pitch(y_processed)
-            confidence = 0.6 if frequency > 0 else 0.0
-        else:
-            raise ValueError(f"未知的检测方法: {method}")
+        frequency, confidence = detect(y_processed, S=S, acf=acf, y_lag=y_lag, lag_sr=lag_sr)
         
         # 转换为音符
         note = self.pitch_detector.frequency_to_note(frequency)
@@ -94,38 +663,45 @@ class AudioPitchAnalyzer:
         # 找到有声片段
         voiced_segments = AudioUtils.find_voiced_segments(y_processed, sr)
         
-        # 分析每个有声片段
-        segment_pitches = []
-        for start_time, end_time in voiced_segments[:5]:  # 最多分析前5个片段
-            try:
-                segment = AudioUtils.extract_audio_segment(y_processed, sr, start_time, end_time)
-                if len(segment) > sr * 0.05:  # 至少50ms
-                    seg_freq, seg_conf = self.pitch_detector.detect_pitch_multi_method(segment)
-                    if seg_freq > 0:
-                        segment_pitches.append({
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'frequency': seg_freq,
-                            'confidence': seg_conf,
-                            'note': self.pitch_detector.frequency_to_note(seg_freq)
-                        })
-            except Exception:
-                continue
+        # 确定参与检测的有声片段（最多前5个片段，每段截取到最大时长）
+        # 过滤过短的片段（至少50ms）和超出信号范围的片段
+        signal_duration = len(y_processed) / sr
+        candidates = voiced_segments[:5]
+        candidates = candidates[(candidates.durations > 0.05) & (candidates.start < signal_duration)]
+        seg_starts, seg_ends = candidates.start, candidates.end
+        analysis_ends = seg_ends
+        if self.max_segment_seconds is not None:
+            analysis_ends = np.minimum(seg_ends, seg_starts + self.max_segment_seconds)
+        
+        # 所有片段共用整段信号的逐帧piptrack和YIN结果，只做一次检测
+        seg_freqs = seg_confs = np.zeros(0)
+        if len(candidates):
+            estimates = self.pitch_detector.detect_segments_multi_method(
+                y_processed, list(zip(seg_starts.tolist(), analysis_ends.tolist())),
+                S=S, y_lag=y_lag, lag_sr=lag_sr)
+            seg_freqs, seg_confs = np.array(estimates, dtype=np.float64).reshape(-1, 2).T
+            detected = seg_freqs > 0
+            seg_starts, seg_ends = seg_starts[detected], seg_ends[detected]
+            seg_freqs, seg_confs = seg_freqs[detected], seg_confs[detected]
+        # 所有片段的音符名称一次性批量转换
+        segment_pitches = SegmentPitches.from_columns(
+            seg_starts, seg_ends, seg_freqs, seg_confs,
+            self.pitch_detector.frequencies_to_notes(seg_freqs))
         
         result = {
             'file_path': file_path,
-            'file_name': os.path.basename(file_path),
+            'file_name': os.path.basename(file_path) if file_path is not None else None,
             'audio_info': audio_info,
             'time_range': {
                 'start_time': start_time,
                 'end_time': end_time,
                 'offset_seconds': offset,
                 'duration_seconds': duration,
-                'actual_duration': len(y) / sr
+                'actual_duration': raw_duration
             },
             'overall_pitch': {
-                'frequency': frequency,
-                'confidence': confidence,
+                'frequency': float(frequency),
+                'confidence': float(confidence),
                 'note': note,
                 'method': method
             },
@@ -134,19 +710,25 @@ class AudioPitchAnalyzer:
             'analysis_params': {
                 'sample_rate': sr,
                 'method': method,
-                'tolerance': self.tolerance
-            }
+                'tolerance': self.tolerance,
+                'fmin': self.pitch_detector.fmin,
+                'fmax': self.pitch_detector.fmax,
+                'pitch_sr': lag_sr
+            },
+            '_cache_key': cache_key
         }
         
         return result
     
-    def compare_pitches(self, result1: Dict[str, Any], result2: Dict[str, Any]) -> Dict[str, Any]:
+    def compare_pitches(self, result1: Dict[str, Any], result2: Dict[str, Any],
+                        fast_reject: bool = True) -> Dict[str, Any]:
         """
         比较两个音调分析结果
         
         Args:
             result1: 第一个音频的分析结果
             result2: 第二个音频的分析结果
+            fast_reject: 整体音调明显不同时跳过片段相似性分析
             
         Returns:
             Dict[str, Any]: 比较结果
@@ -156,15 +738,23 @@ class AudioPitchAnalyzer:
         conf1 = result1['overall_pitch']['confidence']
         conf2 = result2['overall_pitch']['confidence']
         
-        # 基本有效性检查
+        # 基本有效性检查：整体音调无效时片段相似性没有意义，直接返回
         if freq1 <= 0 or freq2 <= 0:
+            note1 = result1['overall_pitch']['note']
+            note2 = result2['overall_pitch']['note']
             return {
                 'is_same_pitch': False,
+                'same_note': note1 == note2,
                 'confidence': 0.0,
+                'frequency1': freq1,
+                'frequency2': freq2,
                 'frequency_difference': abs(freq1 - freq2),
                 'relative_error': float('inf'),
-                'note1': result1['overall_pitch']['note'],
-                'note2': result2['overall_pitch']['note'],
+                'tolerance': self.tolerance,
+                'note1': note1,
+                'note2': note2,
+                'segment_similarity': self._empty_segment_similarity(),
+                'files': [result1['file_name'], result2['file_name']],
                 'reason': '无法检测到有效音调'
             }
         
@@ -172,26 +762,53 @@ class AudioPitchAnalyzer:
         freq_diff = abs(freq1 - freq2)
         relative_error = freq_diff / max(freq1, freq2)
         
-        # 判断是否相同
-        is_same = relative_error <= self.tolerance
-        
         # 计算整体置信度
         overall_confidence = min(conf1, conf2) * (1 - relative_error)
         
+        return self._build_comparison(result1, result2, freq_diff, relative_error,
+                                      overall_confidence, fast_reject)
+    
+    def _build_comparison(self, result1: Dict[str, Any], result2: Dict[str, Any],
+                          freq_diff: float, relative_error: float,
+                          overall_confidence: float,
+                          fast_reject: bool = True,
+                          analyze_segments: bool = True) -> Dict[str, Any]:
+        """
+        根据已计算的频率误差组装两个有效音调的比较结果
+        
+        Args:
+            result1: 第一个音频的分析结果
+            result2: 第二个音频的分析结果
+            freq_diff: 频率差异（Hz）
+            relative_error: 相对误差
+            overall_confidence: 整体置信度
+            fast_reject: 整体音调明显不同时跳过片段相似性分析
+            analyze_segments: 为False时总是跳过片段相似性分析
+            
+        Returns:
+            Dict[str, Any]: 比较结果
+        """
+        # 判断是否相同
+        is_same = relative_error <= self.tolerance
+        
         # 比较音符
         note1 = result1['overall_pitch']['note']
         note2 = result2['overall_pitch']['note']
         same_note = note1 == note2
         
-        # 分析片段级别的一致性
-        segment_similarity = self._analyze_segment_similarity(result1, result2)
+        # 分析片段级别的一致性；整体音调相差远超容差时结论已确定，跳过这一步
+        if not analyze_segments or (fast_reject and self._exceeds_reject_margin(relative_error)):
+            segment_similarity = self._empty_segment_similarity()
+            segment_similarity['skipped'] = True
+        else:
+            segment_similarity = self._analyze_segment_similarity(result1, result2)
         
         return {
             'is_same_pitch': is_same,
             'same_note': same_note,
             'confidence': overall_confidence,
-            'frequency1': freq1,
-            'frequency2': freq2,
+            'frequency1': result1['overall_pitch']['frequency'],
+            'frequency2': result2['overall_pitch']['frequency'],
             'frequency_difference': freq_diff,
             'relative_error': relative_error,
             'tolerance': self.tolerance,
@@ -201,6 +818,38 @@ class AudioPitchAnalyzer:
             'files': [result1['file_name'], result2['file_name']]
         }
     
+    def _exceeds_reject_margin(self, relative_error: float) -> bool:
+        """
+        判断整体音调差异是否超过容差加上快速拒绝余量
+        
+        Args:
+            relative_error: 相对误差
+            
+        Returns:
+            bool: 是否可以跳过片段相似性分析
+        """
+        if relative_error >= 1:
+            return True
+        # 相对误差 e 对应的音分数为 -1200·log2(1 - e)
+        cents = -1200 * np.log2(1 - relative_error)
+        tolerance_cents = -1200 * np.log2(1 - min(self.tolerance, 0.999))
+        return cents > tolerance_cents + self.FAST_REJECT_MARGIN_CENTS
+    
+    @staticmethod
+    def _empty_segment_similarity() -> Dict[str, Any]:
+        """
+        返回没有可比较片段时的片段相似性结果
+        
+        Returns:
+            Dict[str, Any]: 片段相似性分析
+        """
+        return {
+            'avg_similarity': 0.0,
+            'matching_segments': 0,
+            'total_comparisons': 0,
+            'match_ratio': 0.0
+        }
+    
     def _analyze_segment_similarity(self, result1: Dict[str, Any], result2: Dict[str, Any]) -> Dict[str, Any]:
         """
         分析片段级别的音调相似性
@@ -216,56 +865,102 @@ class AudioPitchAnalyzer:
         segments2 = result2['segment_pitches']
         
         if not segments1 or not segments2:
-            return {
-                'avg_similarity': 0.0,
-                'matching_segments': 0,
-                'total_comparisons': 0
-            }
+            return self._empty_segment_similarity()
+        
+        f1 = _segment_frequencies(segments1)
+        f2 = _segment_frequencies(segments2)
+        # 先去掉无效频率，后续只需对有效组合做归约，不再需要掩码和中间拷贝
+        f1 = f1[f1 > 0]
+        f2 = f2[f2 > 0]
+        
+        total_comparisons = len(f1) * len(f2)
+        if total_comparisons == 0:
+            return self._empty_segment_similarity()
         
-        similarities = []
-        matching_count = 0
-        
-        # 比较所有片段组合
-        for seg1 in segments1:
-            for seg2 in segments2:
-                freq1 = seg1['frequency']
-                freq2 = seg2['frequency']
-                
-                if freq1 > 0 and freq2 > 0:
-                    relative_error = abs(freq1 - freq2) / max(freq1, freq2)
-                    similarity = 1 - relative_error
-                    similarities.append(similarity)
-                    
-                    if relative_error <= self.tolerance:
-                        matching_count += 1
-        
-        avg_similarity = np.mean(similarities) if similarities else 0.0
+        # 通过广播一次性比较所有片段组合，直接累加得到均值和匹配数
+        f1_col = f1[:, None]
+        f2_row = f2[None, :]
+        relative_errors = np.abs(f1_col - f2_row)
+        relative_errors /= np.maximum(f1_col, f2_row)
+        
+        matching_count = int(np.count_nonzero(relative_errors <= self.tolerance))
+        avg_similarity = 1.0 - float(relative_errors.sum()) / total_comparisons
         
         return {
             'avg_similarity': avg_similarity,
             'matching_segments': matching_count,
-            'total_comparisons': len(similarities),
-            'match_ratio': matching_count / len(similarities) if similarities else 0.0
+            'total_comparisons': total_comparisons,
+            'match_ratio': matching_count / total_comparisons
         }
     
+    def _get_figure(self, name: str, nrows: int, ncols: int, figsize: Tuple[float, float]):
+        """
+        获取可复用的图表：已有且未被关闭时清空后重新布局，否则新建
+        
+        清空整个Figure（而不是逐个清空Axes）可以同时去掉颜色条、双Y轴等附加的坐标轴。
+        
+        Args:
+            name: 图表类型
+            nrows: 子图行数
+            ncols: 子图列数
+            figsize: 图表尺寸（英寸）
+            
+        Returns:
+            Tuple[Figure, Any]: (图表, 子图)
+        """
+        plt = _get_pyplot()
+        fig = self._figures.get(name)
+        if fig is not None and plt.fignum_exists(fig.number):
+            fig.clear()
+        else:
+            fig = plt.figure(figsize=figsize)
+            self._figures[name] = fig
+        return fig, fig.subplots(nrows, ncols)
+    
+    def close(self):
+        """关闭可视化复用的所有图表"""
+        if self._figures:
+            plt = _get_pyplot()
+            for fig in self._figures.values():
+                plt.close(fig)
+            self._figures.clear()
+    
     def visualize_pitch_analysis(self, result: Dict[str, Any], save_path: Optional[str] = None):
         """
         可视化音调分析结果
         
         Args:
             result: 分析结果
-            save_path: 保存路径（可选）
+            save_path: 保存路径，如果为None则显示图表
         """
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+        plt = _get_pyplot()
+        fig, axes = self._get_figure('analysis', 2, 2, (15, 10))
         fig.suptitle(f"Pitch Analysis: {result['file_name']}", fontsize=16)
         
-        # 加载音频用于可视化
-        y, sr = AudioUtils.load_audio(result['file_path'], sr=self.sr)
-        y_processed = AudioUtils.preprocess_audio(y, sr)
-        
-        # 1. 波形图
-        time = np.linspace(0, len(y_processed) / sr, len(y_processed))
-        axes[0, 0].plot(time, y_processed)
+        # 优先复用analyze_pitch缓存的预处理音频，未命中时才重新加载
+        time_range = result.get('time_range', {})
+        cache_key = result.get('_cache_key', (result['file_path'], self.sr,
+                                              time_range.get('offset_seconds', 0.0),
+                                              time_range.get('duration_seconds')))
+        cached = self._get_cached_audio(cache_key)
+        S = None
+        if cached is not None:
+            y_processed, sr, S = cached
+        else:
+            _, _, offset, duration = cache_key
+            y_processed, sr, _ = self._load_processed(result['file_path'], offset, duration)
+        
+        # 1. 波形图（长音频按屏幕分辨率绘制最小/最大值包络，避免绘制全部采样点）
+        # 每个点至少覆盖32个采样，否则包络在短音频上会出现混叠条纹
+        target = self.WAVEFORM_POINTS
+        if len(y_processed) > target * 32:
+            samples_per_point = len(y_processed) // target
+            blocks = y_processed[:target * samples_per_point].reshape(target, samples_per_point)
+            time = np.arange(target, dtype=np.float32) * np.float32(samples_per_point / sr)
+            axes[0, 0].fill_between(time, blocks.min(axis=1), blocks.max(axis=1), linewidth=0)
+        else:
+            time = np.arange(len(y_processed), dtype=np.float32) * np.float32(1.0 / sr)
+            axes[0, 0].plot(time, y_processed)
         axes[0, 0].set_title('Audio Waveform')
         axes[0, 0].set_xlabel('Time (seconds)')
         axes[0, 0].set_ylabel('Amplitude')
@@ -276,12 +971,31 @@ class AudioPitchAnalyzer:
             axes[0, 0].axvspan(start, end, alpha=0.3, color='yellow', label='Voiced Segments')
         
         # 2. 频谱图
-        import librosa.display
-        S = librosa.stft(y_processed)
-        S_db = librosa.amplitude_to_db(np.abs(S), ref=np.max)
-        img = librosa.display.specshow(S_db, x_axis='time', y_axis='hz', sr=sr, ax=axes[0, 1])
+        if S is None:
+            S = self.pitch_detector.compute_spectrogram(y_processed)
+            # 连同重新加载的音频一起写回缓存，再次可视化时无需重复计算
+            self._cache_audio(cache_key, y_processed, sr, S)
+        # 帧数超过子图像素宽度时按块取最大值合并相邻帧，绘制的网格随之缩小
+        hop_length = self.pitch_detector.hop_length
+        frames_per_column = -(-S.shape[1] // self.SPECTROGRAM_COLUMNS)
+        if frames_per_column > 1:
+            n_columns = S.shape[1] // frames_per_column
+            S = S[:, :n_columns * frames_per_column].reshape(
+                S.shape[0], n_columns, frames_per_column).max(axis=2)
+            hop_length *= frames_per_column
+        # S 已是幅度谱（非负），无需再取绝对值生成一份完整拷贝
+        S_db = fast_audio.amplitude_to_db(S)
+        # 频率轴是线性等间隔的，用 imshow 按帧/频率箱的边界直接绘制
+        bin_hz = sr / (2 * (S.shape[0] - 1))
+        img = axes[0, 1].imshow(S_db, origin='lower', aspect='auto', cmap='magma',
+                                interpolation='nearest',
+                                extent=(0, S.shape[1] * hop_length / sr,
+                                        -bin_hz / 2, sr / 2 + bin_hz / 2))
+        axes[0, 1].set_ylim(0, sr / 2)
+        axes[0, 1].set_xlabel('Time')
+        axes[0, 1].set_ylabel('Hz')
         axes[0, 1].set_title('Spectrogram')
-        plt.colorbar(img, ax=axes[0, 1], format='%+2.0f dB')
+        fig.colorbar(img, ax=axes[0, 1], format='%+2.0f dB')
         
         # 3. 音调检测结果
         overall_pitch = result['overall_pitch']
@@ -291,8 +1005,8 @@ class AudioPitchAnalyzer:
         axes[1, 0].set_ylabel('Value')
         
         # 4. 片段音调分布
-        if result['segment_pitches']:
-            segment_freqs = [seg['frequency'] for seg in result['segment_pitches']]
+        if len(result['segment_pitches']):
+            segment_freqs = _segment_frequencies(result['segment_pitches'])
             axes[1, 1].hist(segment_freqs, bins=10, alpha=0.7, edgecolor='black')
             axes[1, 1].axvline(overall_pitch['frequency'], color='red', linestyle='--', 
                               label=f"Overall Pitch: {overall_pitch['frequency']:.1f} Hz")
@@ -302,17 +1016,91 @@ class AudioPitchAnalyzer:
             axes[1, 1].legend()
             axes[1, 1].grid(True)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             print(f"Chart saved to: {save_path}")
+        else:
+            plt.show()
+    
+    def analyze_files(self, file_paths: List[str], method: str = 'multi',
+                      start_time: Optional[str] = None, end_time: Optional[str] = None,
+                      max_workers: Optional[int] = None
+                      ) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        分析多个音频文件，按输入顺序逐个产出结果
+        
+        Args:
+            file_paths: 音频文件路径列表
+            method: 检测方法
+            start_time: 开始时间
+            end_time: 结束时间
+            max_workers: 并行分析的最大进程数。默认在文件数不少于 PARALLEL_MIN_FILES 时
+                         使用CPU核心数，否则顺序分析；为1时在当前进程中顺序分析
+            
+        Yields:
+            Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]:
+                (文件路径, 分析结果, 异常)，分析失败时结果为None、异常为捕获到的错误
+        """
+        # 重复出现的文件只分析一次，进程数不超过需要分析的文件数
+        unique_paths = list(dict.fromkeys(file_paths))
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) if len(unique_paths) >= self.PARALLEL_MIN_FILES else 1
+        
+        if max_workers <= 1:
+            # 顺序分析时用线程池预先解码后续文件（解码在C库中进行，不受GIL限制），
+            # 与当前文件的音调检测重叠；使用磁盘缓存时加载本身已很快，无需预取
+            prefetch = len(unique_paths) > 1 and self.cache_dir is None
+            positions = {file_path: i for i, file_path in enumerate(unique_paths)}
+            with ThreadPoolExecutor(max_workers=min(self.PREFETCH_AHEAD, len(unique_paths))
+                                    if prefetch else 1) as loader:
+                keys = []
+                submitted = 0
+                try:
+                    for file_path in file_paths:
+                        if prefetch:
+                            # 只保持当前文件及其后 PREFETCH_AHEAD 个文件在预取中，
+                            # 每取用一个文件再提交下一个，内存占用不随文件数增长
+                            upto = min(positions[file_path] + self.PREFETCH_AHEAD + 1,
+                                       len(unique_paths))
+                            if upto > submitted:
+                                keys += self._prefetch_audio(loader, unique_paths[submitted:upto],
+                                                             method, start_time, end_time)
+                                submitted = upto
+                        try:
+                            yield file_path, self.analyze_pitch(file_path, method=method,
+                                                                start_time=start_time,
+                                                                end_time=end_time), None
+                        except Exception as e:
+                            yield file_path, None, e
+                finally:
+                    # 未被取用的预取（如分析中途出错或提前结束）不再保留
+                    for key in keys:
+                        future = self._prefetched.pop(key, None)
+                        if future is not None:
+                            future.cancel()
+            return
         
-        plt.show()
+        init_kwargs = self._init_kwargs()
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(unique_paths))) as executor:
+            futures = {file_path: executor.submit(_analyze_file_worker, init_kwargs, file_path,
+                                                  method, start_time, end_time)
+                       for file_path in unique_paths}
+            # 按输入顺序收集结果，保证输出顺序稳定
+            for file_path in file_paths:
+                try:
+                    result = copy.deepcopy(futures[file_path].result())
+                except Exception as e:
+                    yield file_path, None, e
+                    continue
+                yield file_path, result, None
     
     def compare_multiple_files(self, file_paths: List[str], 
                               start_time: Optional[str] = None,
-                              end_time: Optional[str] = None) -> Dict[str, Any]:
+                              end_time: Optional[str] = None,
+                              max_workers: Optional[int] = None,
+                              full_pairwise: bool = True) -> Dict[str, Any]:
         """
         比较多个音频文件的音调
         
@@ -320,6 +1108,9 @@ class AudioPitchAnalyzer:
             file_paths: 音频文件路径列表
             start_time: 开始时间
             end_time: 结束时间
+            max_workers: 并行分析的最大进程数，见 analyze_files
+            full_pairwise: 为False时先按整体音符分组，只对同组文件做片段级比较；
+                           其余文件对仍给出整体音调的比较结论，但跳过片段相似性分析
             
         Returns:
             Dict[str, Any]: 比较结果
@@ -327,29 +1118,57 @@ class AudioPitchAnalyzer:
         if len(file_paths) < 2:
             raise ValueError("至少需要两个音频文件进行比较")
         
-        # 分析所有文件
+        # 分析所有文件（各文件相互独立，文件较多时使用进程池并行分析）
         results = []
-        for file_path in file_paths:
-            try:
-                result = self.analyze_pitch(file_path, start_time=start_time, end_time=end_time)
-                results.append(result)
-            except Exception as e:
-                print(f"分析文件 {file_path} 时出错: {e}")
+        for file_path, result, error in self.analyze_files(file_paths, start_time=start_time,
+                                                           end_time=end_time,
+                                                           max_workers=max_workers):
+            if error is not None:
+                print(f"分析文件 {file_path} 时出错: {error}")
                 continue
+            results.append(result)
         
         if len(results) < 2:
             raise ValueError("成功分析的音频文件少于2个")
         
-        # 进行两两比较
+        # 一次性计算所有文件对的频率误差和置信度
+        n = len(results)
+        freqs = np.array([r['overall_pitch']['frequency'] for r in results], dtype=np.float64)
+        confs = np.array([r['overall_pitch']['confidence'] for r in results], dtype=np.float64)
+        freq_diffs = np.abs(freqs[:, None] - freqs[None, :])
+        valid = (freqs[:, None] > 0) & (freqs[None, :] > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_errors = np.where(valid, freq_diffs / np.maximum(freqs[:, None], freqs[None, :]),
+                                       np.inf)
+        pair_confidences = np.where(valid, np.minimum(confs[:, None], confs[None, :]) *
+                                    (1 - relative_errors), 0.0)
+        
+        rows, cols = np.triu_indices(n, 1)
+        
+        # 按整体音符分组，组间的文件对不做片段级比较
+        if full_pairwise:
+            same_bucket = np.ones((n, n), dtype=bool)
+        else:
+            _, note_codes = np.unique([r['overall_pitch']['note'] for r in results],
+                                      return_inverse=True)
+            same_bucket = note_codes[:, None] == note_codes[None, :]
+        
+        # 进行两两比较（只为报告组装结果字典）
         comparisons = []
-        for i in range(len(results)):
-            for j in range(i + 1, len(results)):
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            if valid[i, j]:
+                comparison = self._build_comparison(results[i], results[j], float(freq_diffs[i, j]),
+                                                    float(relative_errors[i, j]),
+                                                    float(pair_confidences[i, j]),
+                                                    analyze_segments=bool(same_bucket[i, j]))
+            else:
                 comparison = self.compare_pitches(results[i], results[j])
-                comparisons.append(comparison)
+            comparisons.append(comparison)
         
         # 统计分析
-        same_pitch_count = sum(1 for comp in comparisons if comp['is_same_pitch'])
-        avg_confidence = np.mean([comp['confidence'] for comp in comparisons])
+        same_pitch_count = int(np.sum(valid[rows, cols] &
+                                      (relative_errors[rows, cols] <= self.tolerance)))
+        avg_confidence = float(pair_confidences[rows, cols].mean())
         
         return {
             'file_count': len(results),
@@ -385,52 +1204,42 @@ class AudioPitchAnalyzer:
         
         # 加载音频
         duration = end_time - start_time
-        y, sr = AudioUtils.load_audio(file_path, sr=self.sr, 
-                                     duration=duration, offset=start_time)
-        
-        # 预处理音频
-        y = AudioUtils.preprocess_audio(y, sr)
+        y, sr, _ = self._load_processed(file_path, start_time, duration)
         
         # 计算分析参数
         frame_samples = int(frame_size * sr)
         hop_samples = frame_samples // 2  # 50% 重叠
         
-        # 存储分析结果
-        times = []
-        frequencies = []
-        notes = []
-        confidences = []
-        intervals = []
+        frame_starts = np.arange(0, max(len(y) - frame_samples, 0), hop_samples)
+        n_frames = len(frame_starts)
+        times = start_time + (frame_starts + frame_samples // 2) / sr
         
-        # 逐帧分析音调
-        for i in range(0, len(y) - frame_samples, hop_samples):
-            frame = y[i:i + frame_samples]
-            
-            # 计算时间点
-            time_point = start_time + (i + frame_samples // 2) / sr
-            times.append(time_point)
-            
-            # 检测音调
-            freq, conf = self.pitch_detector.detect_fundamental_frequency(frame)
-            
-            frequencies.append(freq)
-            confidences.append(conf)
-            
-            # 转换为音符
-            if freq > 0:
-                note = self.pitch_detector.frequency_to_note(freq)
-                notes.append(note)
-            else:
-                notes.append("Silent")
+        # 所有帧一次性批量检测音调（帧为原信号的视图，不复制数据）
+        if n_frames:
+            frames = np.lib.stride_tricks.sliding_window_view(y, frame_samples)[::hop_samples][:n_frames]
+        else:
+            frames = np.zeros((0, frame_samples), dtype=y.dtype)
+        frequencies, confidences = self.pitch_detector.track_fundamental_frequency(frames)
         
-        # 计算音程（以半音为单位）
-        for i, freq in enumerate(frequencies):
-            if i == 0 or freq <= 0 or frequencies[0] <= 0:
-                intervals.append(0)
-            else:
-                # 计算相对于第一个音符的音程（半音数）
-                interval = 12 * np.log2(freq / frequencies[0]) if frequencies[0] > 0 else 0
-                intervals.append(interval)
+        # 转换为音符
+        notes = self.pitch_detector.frequencies_to_notes(frequencies, unknown="Silent")
+        
+        # 计算相对于第一帧的音程（半音数），无效帧记为0
+        intervals = np.zeros(n_frames)
+        if n_frames and frequencies[0] > 0:
+            voiced = frequencies > 0
+            intervals[voiced] = 12 * np.log2(frequencies[voiced] / frequencies[0])
+            intervals[0] = 0.0
+        
+        # 没有有声帧（如整段静音）时平均频率记为0
+        voiced_frequencies = frequencies[frequencies > 0]
+        avg_frequency = float(np.mean(voiced_frequencies)) if len(voiced_frequencies) else 0.0
+        avg_confidence = float(np.mean(confidences)) if n_frames else 0.0
+        
+        times = times.tolist()
+        frequencies = frequencies.tolist()
+        confidences = confidences.tolist()
+        intervals = intervals.tolist()
         
         return {
             'file_path': file_path,
@@ -448,11 +1257,11 @@ class AudioPitchAnalyzer:
                 'intervals': intervals
             },
             'statistics': {
-                'avg_frequency': np.mean([f for f in frequencies if f > 0]),
+                'avg_frequency': avg_frequency,
                 'max_interval': max(intervals) if intervals else 0,
                 'min_interval': min(intervals) if intervals else 0,
                 'interval_range': max(intervals) - min(intervals) if intervals else 0,
-                'avg_confidence': np.mean(confidences)
+                'avg_confidence': avg_confidence
             }
         }
     
@@ -472,7 +1281,8 @@ class AudioPitchAnalyzer:
         notes = data['notes']
         
         # 创建图表
-        fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(14, 12))
+        plt = _get_pyplot()
+        fig, (ax1, ax2, ax3) = self._get_figure('contour', 3, 1, (14, 12))
         
         # 子图1: 音程变化（使用科学音高记号法）
         ax1.plot(times, intervals, 'b-', linewidth=2, label='Interval (semitones)')
@@ -523,15 +1333,13 @@ class AudioPitchAnalyzer:
         fig.text(0.02, 0.02, info_text, fontsize=10, 
                 bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray", alpha=0.8))
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             print(f"Pitch contour chart saved: {save_path}")
         else:
             plt.show()
-        
-        plt.close()
     
     def _add_scientific_pitch_labels(self, ax, frequencies, intervals):
         """添加科学音高记号法的 Y 轴标记"""
@@ -553,18 +1361,10 @@ class AudioPitchAnalyzer:
         y_min = int(min_interval) - 3
         y_max = int(max_interval) + 3
         
-        # 生成音程标记
-        pitch_ticks = []
-        pitch_labels = []
-        
-        for interval in range(y_min, y_max + 1, 2):  # 每2个半音标记一次
-            # 计算对应的频率
-            freq = base_freq * (2 ** (interval / 12))
-            # 转换为音符
-            note = self.pitch_detector.frequency_to_note(freq)
-            
-            pitch_ticks.append(interval)
-            pitch_labels.append(f"{note}")
+        # 生成音程标记（每2个半音标记一次），对应频率一次性批量转换为音符
+        pitch_ticks = list(range(y_min, y_max + 1, 2))
+        tick_freqs = base_freq * np.exp2(np.array(pitch_ticks) / 12)
+        pitch_labels = self.pitch_detector.frequencies_to_notes(tick_freqs)
         
         # 设置右侧 Y 轴为科学音高记号
         ax2_right = ax.twinx()
@@ -580,22 +1380,19 @@ class AudioPitchAnalyzer:
             return
         
         # 找到显著的音程变化点
-        significant_changes = []
         threshold = 2.0  # 2个半音的变化阈值
-        
-        for i in range(1, len(intervals)):
-            change = abs(intervals[i] - intervals[i-1])
-            if change > threshold and notes[i] != "Silent":
-                significant_changes.append(i)
+        interval_arr = np.asarray(intervals, dtype=float)
+        change = np.abs(np.diff(interval_arr))
+        not_silent = np.asarray(notes[1:len(interval_arr)]) != "Silent"
+        significant_changes = np.flatnonzero((change > threshold) & not_silent) + 1
         
         # 限制标注数量，避免过于拥挤
         max_annotations = 8
-        if len(significant_changes) > max_annotations:
-            # 选择变化最大的点
-            changes_with_index = [(abs(intervals[i] - intervals[i-1]), i) 
-                                for i in significant_changes]
-            changes_with_index.sort(reverse=True)
-            significant_changes = [idx for _, idx in changes_with_index[:max_annotations]]
+        if significant_changes.size > max_annotations:
+            # 选择变化最大的点（argpartition 为 O(N) 的 top-k，无需完整排序）
+            mag = change[significant_changes - 1]
+            topk = np.argpartition(-mag, max_annotations)[:max_annotations]
+            significant_changes = significant_changes[topk]
         
         # 添加标注
         for i in significant_changes:
@@ -1,19 +1,71 @@
 import numpy as np
-import librosa
 import soundfile as sf
+import fast_audio
 from pydub import AudioSegment
 import os
-from typing import Tuple, Optional
+import json
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import Iterator, Tuple, Optional
 import warnings
 
 warnings.filterwarnings('ignore')
 
+
+@dataclass(eq=False)
+class VoicedSegments:
+    """
+    有声片段的时间范围，起点和终点分别按列存储
+    
+    时长计算、过滤等操作可以直接在整列数组上完成。
+    迭代得到 (start, end) 元组，切片返回新的 VoicedSegments，与原先的元组列表用法兼容。
+    """
+    start: np.ndarray
+    end: np.ndarray
+    
+    @property
+    def durations(self) -> np.ndarray:
+        """各片段的时长（秒）"""
+        return self.end - self.start
+    
+    def __len__(self) -> int:
+        return len(self.start)
+    
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.start[index].item(), self.end[index].item()
+        return VoicedSegments(self.start[index], self.end[index])
+    
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.start.tolist(), self.end.tolist())
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, VoicedSegments):
+            return np.array_equal(self.start, other.start) and np.array_equal(self.end, other.end)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+    
+    def to_list(self) -> list:
+        """
+        转换为 [(start1, end1), (start2, end2), ...] 列表（便于打印和JSON序列化）
+        
+        Returns:
+            list: 片段时间范围列表
+        """
+        return list(self)
+
+
 class AudioUtils:
     """音频处理工具类"""
     
+    # 预处理结果磁盘缓存的默认目录
+    DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pitch-analyzer')
+    
     @staticmethod
     def load_audio(file_path: str, sr: int = 22050, duration: Optional[float] = None, 
-                   offset: float = 0.0) -> Tuple[np.ndarray, int]:
+                   offset: float = 0.0, info: Optional[dict] = None) -> Tuple[np.ndarray, int]:
         """
         加载音频文件
         
@@ -22,6 +74,8 @@ class AudioUtils:
             sr: 目标采样率
             duration: 加载时长（秒），None为全部加载
             offset: 开始时间偏移（秒）
+            info: 可选的字典，提供时在同一次打开文件的过程中写入音频信息
+                  （与 get_audio_info 的返回值相同），无法获取时保持为空
             
         Returns:
             Tuple[np.ndarray, int]: (音频数据, 采样率)
@@ -30,14 +84,37 @@ class AudioUtils:
             raise FileNotFoundError(f"音频文件不存在: {file_path}")
         
         try:
-            # 使用librosa加载音频，支持offset和duration
-            y, sr_original = librosa.load(file_path, sr=sr, duration=duration, 
-                                        offset=offset, mono=True)
+            # 优先用soundfile打开文件，音频信息与解码共用同一个文件句柄
+            with sf.SoundFile(file_path) as f:
+                if info is not None:
+                    info.update(AudioUtils._soundfile_info(f))
+                # 只解码 offset 起 duration 秒的数据，混合为单声道后重采样
+                y, sr = fast_audio.load(f, sr=sr, duration=duration, offset=offset)
             return y, sr
         except Exception as e:
-            print(f"使用librosa加载失败，尝试使用pydub: {e}")
+            print(f"使用soundfile加载失败，尝试使用pydub: {e}")
             return AudioUtils._load_audio_with_pydub(file_path, sr, duration, offset)
     
+    @staticmethod
+    def _soundfile_info(f: sf.SoundFile) -> dict:
+        """
+        从已打开的soundfile句柄读取音频信息
+        
+        Args:
+            f: soundfile文件句柄
+            
+        Returns:
+            dict: 音频信息
+        """
+        return {
+            'duration': f.frames / f.samplerate,
+            'sample_rate': f.samplerate,
+            'channels': f.channels,
+            'format': f.format,
+            'subtype': f.subtype,
+            'frames': f.frames
+        }
+    
     @staticmethod
     def _load_audio_with_pydub(file_path: str, sr: int = 22050, 
                               duration: Optional[float] = None, 
@@ -62,10 +139,7 @@ class AudioUtils:
             if audio.channels > 1:
                 audio = audio.set_channels(1)
             
-            # 重采样
-            if audio.frame_rate != sr:
-                audio = audio.set_frame_rate(sr)
-            
+            # 先截取再重采样，只处理需要的片段
             # 计算开始和结束位置（毫秒）
             start_ms = int(offset * 1000)
             end_ms = len(audio)
@@ -76,9 +150,19 @@ class AudioUtils:
             if start_ms > 0 or end_ms < len(audio):
                 audio = audio[start_ms:end_ms]
             
-            # 转换为numpy数组
-            y = np.array(audio.get_array_of_samples(), dtype=np.float32)
-            y = y / (2**15)  # 归一化到[-1, 1]
+            # 直接把原始PCM缓冲区视为整数数组，避免逐个采样经过Python对象转换
+            sample_dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(audio.sample_width)
+            if sample_dtype is not None:
+                samples = np.frombuffer(audio.raw_data, dtype=sample_dtype)
+            else:
+                samples = np.asarray(audio.get_array_of_samples())
+            
+            # 按采样位宽归一化到[-1, 1]（预先算好缩放系数，原地相乘）
+            y = samples.astype(np.float32)
+            y *= np.float32(1.0 / (1 << (8 * audio.sample_width - 1)))
+            
+            # 重采样（soxr带限插值，比pydub逐采样的线性插值更快、质量更高）
+            y = fast_audio.resample(y, audio.frame_rate, sr)
             
             return y, sr
         except Exception as e:
@@ -97,20 +181,159 @@ class AudioUtils:
             np.ndarray: 预处理后的音频信号
         """
         # 移除静音部分
-        y_trimmed, _ = librosa.effects.trim(y, top_db=20)
+        y_trimmed = AudioUtils.trim_silence(y, top_db=20)
         
         # 如果音频太短，返回原始音频
         if len(y_trimmed) < sr * 0.1:  # 少于0.1秒
             y_trimmed = y
         
-        # 归一化
-        if np.max(np.abs(y_trimmed)) > 0:
-            y_trimmed = y_trimmed / np.max(np.abs(y_trimmed))
+        # 统一为float32，后续的FFT和逐帧计算都沿用单精度
+        y_float = np.asarray(y_trimmed, dtype=np.float32)
+        
+        # 归一化（峰值只计算一次）；类型转换已复制数据时原地相除，否则不修改调用方的数组
+        peak = np.max(np.abs(y_float))
+        if peak > 0:
+            y_float = np.divide(y_float, peak, out=y_float if y_float is not y_trimmed else None)
+        
+        # 高通滤波器（预加重 y[n] - 0.97*y[n-1]），移除低频噪声
+        y_filtered = AudioUtils.preemphasis(y_float)
+        
+        return np.ascontiguousarray(y_filtered, dtype=np.float32)
+    
+    @staticmethod
+    def trim_silence(y: np.ndarray, top_db: float = 20, frame_length: int = 2048,
+                     hop_length: int = 512) -> np.ndarray:
+        """
+        去除首尾静音，判定方式与 librosa.effects.trim 相同
+        
+        Args:
+            y: 音频信号
+            top_db: 低于峰值RMS多少分贝视为静音
+            frame_length: 帧长度
+            hop_length: 帧移
+            
+        Returns:
+            np.ndarray: 去除首尾静音后的音频信号（原数组的切片）
+        """
+        rms = AudioUtils.calculate_rms_energy(y, frame_length=frame_length, hop_length=hop_length)
+        
+        # 以峰值RMS为参考转换为分贝（amin=1e-5，与 amplitude_to_db 一致）
+        power = np.square(rms)
+        ref = np.square(np.max(rms)) if rms.size else 0.0
+        db = 10.0 * np.log10(np.maximum(1e-10, power)) - 10.0 * np.log10(np.maximum(1e-10, ref))
+        nonzero = np.flatnonzero(db > -top_db)
+        
+        if nonzero.size == 0:
+            return y[0:0]
+        
+        # 终点取最后一个非静音帧的下一帧
+        start = int(nonzero[0]) * hop_length
+        end = min(len(y), (int(nonzero[-1]) + 1) * hop_length)
+        return y[start:end]
+    
+    @staticmethod
+    def preemphasis(y: np.ndarray, coef: float = 0.97) -> np.ndarray:
+        """
+        预加重滤波 y[n] - coef*y[n-1]
         
-        # 高通滤波器，移除低频噪声
-        y_filtered = librosa.effects.preemphasis(y_trimmed)
+        Args:
+            y: 音频信号
+            coef: 预加重系数
+            
+        Returns:
+            np.ndarray: 滤波后的信号
+        """
+        if len(y) < 2:
+            return np.array(y, copy=True)
         
-        return y_filtered
+        # 直接写入输出数组，不产生 coef*y 的临时数组
+        y_out = np.empty_like(y)
+        np.multiply(y[:-1], -y.dtype.type(coef), out=y_out[1:])
+        y_out[1:] += y[1:]
+        # 首个样本沿用 librosa 默认的线性外推初始状态
+        y_out[0] = y[0] + (2 * y[0] - y[1])
+        return y_out
+    
+    @staticmethod
+    def load_audio_cached(file_path: str, sr: int = 22050, duration: Optional[float] = None,
+                          offset: float = 0.0, cache_dir: Optional[str] = None,
+                          info: Optional[dict] = None) -> Tuple[np.ndarray, int, float]:
+        """
+        加载并预处理音频，预处理结果以 .npy 文件缓存到磁盘
+        
+        缓存键由文件绝对路径、修改时间、采样率、offset 和 duration 组成，文件被修改后自动失效。
+        命中时以内存映射方式只读打开，跳过解码、重采样、去静音和预加重。
+        
+        Args:
+            file_path: 音频文件路径
+            sr: 目标采样率
+            duration: 加载时长（秒），None表示加载到结尾
+            offset: 开始时间偏移（秒）
+            cache_dir: 缓存目录（可选，默认为 DEFAULT_CACHE_DIR）
+            info: 可选的字典，传入时写入音频文件信息
+            
+        Returns:
+            Tuple[np.ndarray, int, float]: (预处理后的音频（只读）, 采样率, 预处理前的音频时长（秒）)
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"音频文件不存在: {file_path}")
+        
+        cache_dir = cache_dir or AudioUtils.DEFAULT_CACHE_DIR
+        key_source = repr((os.path.abspath(file_path), os.path.getmtime(file_path),
+                           sr, float(offset), duration))
+        key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+        data_path = os.path.join(cache_dir, f"{key}.npy")
+        meta_path = os.path.join(cache_dir, f"{key}.json")
+        
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            y_processed = np.load(data_path, mmap_mode='r')
+            if info is not None:
+                info.update(meta['info'])
+            return y_processed, sr, meta['raw_duration']
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        audio_info = {}
+        y, sr = AudioUtils.load_audio(file_path, sr=sr, duration=duration, offset=offset,
+                                      info=audio_info)
+        if not audio_info:
+            audio_info = AudioUtils.get_audio_info(file_path)
+        raw_duration = len(y) / sr
+        y_processed = AudioUtils.preprocess_audio(y, sr)
+        if info is not None:
+            info.update(audio_info)
+        
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            meta = json.dumps({'raw_duration': raw_duration, 'info': audio_info})
+            AudioUtils._write_atomic(data_path, lambda f: np.save(f, y_processed))
+            AudioUtils._write_atomic(meta_path, lambda f: f.write(meta.encode('utf-8')))
+        except (OSError, TypeError, ValueError):
+            # 缓存目录不可写或信息无法序列化时只跳过缓存
+            pass
+        
+        return y_processed, sr, raw_duration
+    
+    @staticmethod
+    def _write_atomic(path: str, write) -> None:
+        """
+        先写入同目录下的临时文件再改名，并行的进程不会读到写了一半的文件
+        
+        Args:
+            path: 目标文件路径
+            write: 接收二进制文件对象并写入内容的函数
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     @staticmethod
     def get_audio_info(file_path: str) -> dict:
@@ -128,15 +351,8 @@ class AudioUtils:
         
         try:
             # 使用soundfile获取信息
-            info = sf.info(file_path)
-            return {
-                'duration': info.duration,
-                'sample_rate': info.samplerate,
-                'channels': info.channels,
-                'format': info.format,
-                'subtype': info.subtype,
-                'frames': info.frames
-            }
+            with sf.SoundFile(file_path) as f:
+                return AudioUtils._soundfile_info(f)
         except Exception:
             try:
                 # 备用方案：使用pydub
@@ -191,10 +407,18 @@ class AudioUtils:
         Returns:
             np.ndarray: RMS能量数组
         """
-        return librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+        # 与 librosa.feature.rms(center=True) 一致：两端补零半帧后按帧移取滑动窗口
+        y = np.asarray(y)
+        if not np.issubdtype(y.dtype, np.floating):
+            y = y.astype(np.float32)
+        # 先对整段信号求平方再取滑动窗口，避免把重叠的帧展开成 frame_length/hop_length 倍大的数组
+        power = np.square(np.pad(y, frame_length // 2))
+        frames = np.lib.stride_tricks.sliding_window_view(power, frame_length)[::hop_length]
+        rms = np.sqrt(frames.mean(axis=1))
+        return rms.astype(np.float32, copy=False)
     
     @staticmethod
-    def find_voiced_segments(y: np.ndarray, sr: int, min_duration: float = 0.1) -> list:
+    def find_voiced_segments(y: np.ndarray, sr: int, min_duration: float = 0.1) -> VoicedSegments:
         """
         找到有声音的片段
         
@@ -204,7 +428,7 @@ class AudioUtils:
             min_duration: 最小片段长度（秒）
             
         Returns:
-            list: 有声片段的时间范围列表 [(start1, end1), (start2, end2), ...]
+            VoicedSegments: 有声片段的起点和终点时间数组，可按 (start, end) 迭代
         """
         # 计算RMS能量
         rms = AudioUtils.calculate_rms_energy(y)
@@ -217,28 +441,18 @@ class AudioUtils:
         
         # 转换为时间
         hop_length = 512
-        frame_times = librosa.frames_to_time(np.arange(len(voiced_frames)), sr=sr, hop_length=hop_length)
-        
-        # 找到连续的有声片段
-        segments = []
-        start_time = None
-        
-        for i, is_voiced in enumerate(voiced_frames):
-            if is_voiced and start_time is None:
-                start_time = frame_times[i]
-            elif not is_voiced and start_time is not None:
-                end_time = frame_times[i]
-                if end_time - start_time >= min_duration:
-                    segments.append((start_time, end_time))
-                start_time = None
-        
-        # 处理最后一个片段
-        if start_time is not None:
-            end_time = frame_times[-1]
-            if end_time - start_time >= min_duration:
-                segments.append((start_time, end_time))
-        
-        return segments
+        frame_times = np.arange(len(voiced_frames)) * hop_length / sr
+        
+        # 通过边沿检测找到连续的有声片段：+1 为起点，-1 为终点
+        edges = np.diff(np.concatenate(([0], voiced_frames.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        # 延续到最后一帧的片段以最后一帧时间为终点
+        ends = np.minimum(np.flatnonzero(edges == -1), len(frame_times) - 1)
+        
+        start_times = frame_times[starts]
+        end_times = frame_times[ends]
+        segments = VoicedSegments(start_times, end_times)
+        return segments[segments.durations >= min_duration]
     
     @staticmethod
     def supported_formats() -> list:
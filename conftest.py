@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pytest 共用夹具：测试音频和分析器在整个测试会话中只创建一次
+"""
+
+import pytest
+from audio_pitch_analyzer import AudioPitchAnalyzer
+from test_time_range import create_test_audio_with_segments
+
+@pytest.fixture(scope='session')
+def shared_analyzer():
+    """所有测试共用的分析器，加载和分析结果的缓存在测试之间复用"""
+    return AudioPitchAnalyzer(tolerance=0.05)
+
+@pytest.fixture(scope='session')
+def multi_segment_wav(tmp_path_factory):
+    """三段不同音调的30秒测试音频文件（写入临时目录，会话结束后由pytest清理）"""
+    path = tmp_path_factory.mktemp('audio') / 'test_multi_segments.wav'
+    return create_test_audio_with_segments(str(path))
@@ -6,8 +6,9 @@
 
 import numpy as np
 import soundfile as sf
+import os
 
-def create_pitch_changing_sample():
+def create_pitch_changing_sample(out_dir='.'):
     """创建音调变化的测试样本"""
     
     # 参数
@@ -26,24 +27,25 @@ def create_pitch_changing_sample():
     freq_variation = freq_start + (freq_peak - freq_start) * np.sin(2 * np.pi * 0.2 * t)
     
     # 生成音频信号
+    # 相位累加保持双精度以免长时间累积误差，输出用float32
     phase = np.cumsum(2 * np.pi * freq_variation / sr)
-    audio = 0.3 * np.sin(phase)
+    audio = np.sin(phase, out=np.empty(len(phase), dtype=np.float32))
+    audio *= 0.3
     
     # 添加包络以避免突然的开始和结束
-    envelope = np.ones_like(audio)
     fade_samples = int(0.1 * sr)  # 0.1秒淡入淡出
-    envelope[:fade_samples] = np.linspace(0, 1, fade_samples)
-    envelope[-fade_samples:] = np.linspace(1, 0, fade_samples)
-    audio *= envelope
+    fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
+    audio[:fade_samples] *= fade_in
+    audio[-fade_samples:] *= fade_in[::-1]  # 淡出直接使用淡入曲线的反向视图
     
     # 保存文件
-    filename = "sample_pitch_changing.wav"
-    sf.write(filename, audio, sr)
+    filename = os.path.join(out_dir, "sample_pitch_changing.wav")
+    sf.write(filename, audio, sr, subtype='PCM_16')
     print(f"创建音调变化样本: {filename}")
     
     return filename
 
-def create_scale_sample():
+def create_scale_sample(out_dir='.'):
     """创建音阶样本"""
     
     # 参数
@@ -62,37 +64,40 @@ def create_scale_sample():
         523.25   # C5
     ]
     
-    audio = []
+    # 每个音符长度相同，时间轴和包络只计算一次
+    note_samples = int(sr * note_duration)
+    t = np.linspace(0, note_duration, note_samples)
+    fade_samples = int(0.05 * sr)  # 0.05秒淡入淡出
+    envelope = np.ones(note_samples, dtype=np.float32)
+    envelope[:fade_samples] = np.linspace(0, 1, fade_samples)
+    envelope[-fade_samples:] = envelope[fade_samples - 1::-1]
+    envelope *= 0.3
     
-    for freq in frequencies:
-        # 为每个音符生成音频
-        t = np.linspace(0, note_duration, int(sr * note_duration))
-        note_audio = 0.3 * np.sin(2 * np.pi * freq * t)
-        
-        # 添加包络
-        fade_samples = int(0.05 * sr)  # 0.05秒淡入淡出
-        envelope = np.ones_like(note_audio)
-        envelope[:fade_samples] = np.linspace(0, 1, fade_samples)
-        envelope[-fade_samples:] = np.linspace(1, 0, fade_samples)
-        note_audio *= envelope
-        
-        audio.extend(note_audio)
+    # 预分配整段输出，逐个音符写入对应的切片
+    audio = np.empty(len(frequencies) * note_samples, dtype=np.float32)
     
-    audio = np.array(audio)
+    for i, freq in enumerate(frequencies):
+        # 为每个音符生成音频并添加包络
+        note_audio = audio[i * note_samples:(i + 1) * note_samples]
+        np.sin(2 * np.pi * freq * t, out=note_audio)
+        np.multiply(note_audio, envelope, out=note_audio)
     
     # 保存文件
-    filename = "sample_scale.wav"
-    sf.write(filename, audio, sr)
+    filename = os.path.join(out_dir, "sample_scale.wav")
+    sf.write(filename, audio, sr, subtype='PCM_16')
     print(f"创建音阶样本: {filename}")
     
     return filename
 
+def create_all(out_dir='.'):
+    """创建全部音调变化测试样本（供测试在进程内直接调用），返回文件路径列表"""
+    return [create_pitch_changing_sample(out_dir), create_scale_sample(out_dir)]
+
 if __name__ == "__main__":
     print("创建音调变化测试样本...")
     
     # 创建样本
-    changing_file = create_pitch_changing_sample()
-    scale_file = create_scale_sample()
+    changing_file, scale_file = create_all()
     
     print(f"\n测试命令:")
     print(f"python main.py {changing_file} --pitch-contour --start-time 0 --end-time 5 --frame-size 0.05")
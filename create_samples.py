@@ -8,8 +8,8 @@ import numpy as np
 import soundfile as sf
 import os
 
-def create_sample_audio():
-    """创建示例音频文件"""
+def create_sample_audio(out_dir='.'):
+    """创建示例音频文件，返回文件路径列表"""
     print("正在创建示例音频文件...")
     
     # 音频参数
@@ -17,6 +17,10 @@ def create_sample_audio():
     duration = 2  # 时长（秒）
     t = np.linspace(0, duration, int(sr * duration))
     
+    # 包络与输出缓冲区都用float32，所有样本共用同一个包络
+    envelope = np.exp(-t * 0.5).astype(np.float32)  # 指数衰减
+    audio = np.empty(len(t), dtype=np.float32)
+    
     # 创建不同音调的音频文件
     samples = [
         {"freq": 440, "note": "A4", "filename": "sample_A4.wav"},
@@ -25,22 +29,30 @@ def create_sample_audio():
         {"freq": 440, "note": "A4_copy", "filename": "sample_A4_copy.wav"},
     ]
     
+    paths = []
     for sample in samples:
-        # 生成正弦波
-        audio = 0.3 * np.sin(2 * np.pi * sample["freq"] * t)
+        # 生成正弦波（相位按双精度计算，结果直接写入float32缓冲区）
+        np.sin(2 * np.pi * sample["freq"] * t, out=audio)
+        audio *= 0.3
         
         # 添加一些包络，使音频更自然
-        envelope = np.exp(-t * 0.5)  # 指数衰减
-        audio = audio * envelope
+        audio *= envelope
         
         # 保存音频文件
-        sf.write(sample["filename"], audio, sr)
-        print(f"创建: {sample['filename']} - {sample['note']} ({sample['freq']} Hz)")
+        path = os.path.join(out_dir, sample["filename"])
+        sf.write(path, audio, sr, subtype='PCM_16')
+        paths.append(path)
+        print(f"创建: {path} - {sample['note']} ({sample['freq']} Hz)")
     
-    print(f"\n示例音频文件已创建在当前目录")
+    print(f"\n示例音频文件已创建在目录: {out_dir}")
     print("您可以使用以下命令测试:")
     print("python main.py sample_A4.wav sample_C5.wav")
     print("python main.py sample_A4.wav sample_A4_copy.wav")
+    return paths
+
+def create_all(out_dir='.'):
+    """创建全部示例音频文件（供测试在进程内直接调用），返回文件路径列表"""
+    return create_sample_audio(out_dir)
 
 if __name__ == "__main__":
-    create_sample_audio()
+    create_all()
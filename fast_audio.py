@@ -0,0 +1,363 @@
+"""
+音频处理的底层数值原语：加载、重采样、分帧、分贝转换、piptrack 和 YIN
+
+这些功能原先通过librosa调用，这里直接用numpy/scipy/soundfile实现，
+结果与librosa 0.11的默认行为一致，从而去掉librosa及其numba、audioread等
+依赖带来的导入开销和版本兼容问题。
+"""
+import numpy as np
+import soundfile as sf
+from math import gcd
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import resample_poly
+from typing import Optional, Tuple
+
+try:
+    import soxr
+except ImportError:  # soxr 为可选依赖，未安装时退回scipy的多相滤波重采样
+    soxr = None
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba 为可选依赖，未安装时使用numpy向量化实现
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+def frame(x: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """
+    沿最后一维把信号切分为重叠的帧（只读视图，不复制数据）
+
+    Args:
+        x: 信号 [shape=(..., n_samples)]
+        frame_length: 帧长度
+        hop_length: 帧移
+
+    Returns:
+        np.ndarray: 帧 [shape=(..., frame_length, n_frames)]
+    """
+    if x.shape[-1] < frame_length:
+        raise ValueError(f"信号长度 {x.shape[-1]} 小于帧长度 {frame_length}")
+    frames = np.lib.stride_tricks.sliding_window_view(x, frame_length, axis=-1)
+    return np.swapaxes(frames[..., ::hop_length, :], -1, -2)
+
+
+def fix_length(y: np.ndarray, size: int) -> np.ndarray:
+    """
+    截断或在末尾补零，使信号长度恰好为 size
+
+    Args:
+        y: 一维信号
+        size: 目标长度
+
+    Returns:
+        np.ndarray: 长度为 size 的信号
+    """
+    if len(y) > size:
+        return y[:size]
+    if len(y) < size:
+        return np.pad(y, (0, size - len(y)))
+    return y
+
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int,
+             quality: str = 'soxr_hq') -> np.ndarray:
+    """
+    重采样一维信号，输出长度为 ceil(len(y) * target_sr / orig_sr)
+
+    Args:
+        y: 一维信号
+        orig_sr: 原采样率
+        target_sr: 目标采样率
+        quality: soxr的质量档位（如 'soxr_hq'、'soxr_qq'）；未安装soxr时忽略
+
+    Returns:
+        np.ndarray: 重采样后的信号，dtype与输入相同
+    """
+    if orig_sr == target_sr:
+        return y
+
+    n_samples = int(np.ceil(len(y) * float(target_sr) / orig_sr))
+    if soxr is not None:
+        y_hat = soxr.resample(y, orig_sr, target_sr, quality=quality)
+    else:
+        divisor = gcd(int(orig_sr), int(target_sr))
+        y_hat = resample_poly(y, int(target_sr) // divisor, int(orig_sr) // divisor)
+    return np.asarray(fix_length(y_hat, n_samples), dtype=y.dtype)
+
+
+def load(source, sr: Optional[int] = 22050, offset: float = 0.0,
+         duration: Optional[float] = None) -> Tuple[np.ndarray, int]:
+    """
+    用soundfile读取音频，混合为单声道并重采样，只解码 offset 起 duration 秒的数据
+
+    Args:
+        source: 音频文件路径或已打开的 soundfile.SoundFile
+        sr: 目标采样率，None表示保持原采样率
+        offset: 开始时间偏移（秒）
+        duration: 读取时长（秒），None表示读到结尾
+
+    Returns:
+        Tuple[np.ndarray, int]: (float32单声道音频, 采样率)
+    """
+    context = source if isinstance(source, sf.SoundFile) else sf.SoundFile(source)
+    with context as f:
+        sr_native = f.samplerate
+        if offset:
+            f.seek(int(offset * sr_native))
+        frames = int(duration * sr_native) if duration is not None else -1
+        y = f.read(frames=frames, dtype='float32', always_2d=False)
+
+    # 多声道取平均混合为单声道
+    if y.ndim > 1:
+        y = np.mean(y, axis=1)
+
+    if sr is None:
+        return y, sr_native
+    return resample(y, sr_native, sr), sr
+
+
+def amplitude_to_db(S: np.ndarray, amin: float = 1e-5,
+                    top_db: Optional[float] = 80.0) -> np.ndarray:
+    """
+    把幅度谱转换为相对于其最大值的分贝值
+
+    Args:
+        S: 幅度谱（非负）
+        amin: 最小幅度，避免对0取对数
+        top_db: 动态范围下限（低于最大值 top_db 分贝的值被截断），None表示不截断
+
+    Returns:
+        np.ndarray: 分贝值（最大值处为0）
+    """
+    power = np.square(S)
+    ref = np.square(np.max(S)) if S.size else 0.0
+    log_spec = 10.0 * np.log10(np.maximum(amin * amin, power))
+    log_spec -= 10.0 * np.log10(np.maximum(amin * amin, ref))
+    if top_db is not None:
+        log_spec = np.maximum(log_spec, log_spec.max() - top_db)
+    return log_spec
+
+
+def _parabolic_shift(x: np.ndarray) -> np.ndarray:
+    """
+    沿倒数第二维对每个点做三点抛物线插值，返回极值相对于该点的偏移
+
+    偏移超出 [-1, 1] 的点以及首尾两点的偏移记为0。
+
+    Args:
+        x: 数组 [shape=(..., n, t)]
+
+    Returns:
+        np.ndarray: 偏移量，形状和dtype与 x 相同
+    """
+    shift = np.zeros_like(x)
+    left = x[..., :-2, :]
+    center = x[..., 1:-1, :]
+    right = x[..., 2:, :]
+    # 两侧之和与之差按输入精度计算，其余部分用双精度，与librosa（numba）的数值一致
+    a = (right + left) - 2 * center.astype(np.float64)
+    b = (right - left) / np.float64(2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift[..., 1:-1, :] = np.where(np.abs(b) >= np.abs(a), 0.0, -b / a)
+    return shift
+
+
+def _local_extremum(x: np.ndarray, maximum: bool) -> np.ndarray:
+    """
+    沿倒数第二维标记局部极大（或极小）值：严格大于前一点且不小于后一点
+
+    Args:
+        x: 数组 [shape=(..., n, t)]
+        maximum: True为局部极大，False为局部极小
+
+    Returns:
+        np.ndarray: 布尔数组，形状与 x 相同；首点为False，末点只与前一点比较
+    """
+    if not maximum:
+        x = -x
+    mask = np.zeros(x.shape, dtype=bool)
+    mask[..., 1:-1, :] = (x[..., 1:-1, :] > x[..., :-2, :]) & (x[..., 1:-1, :] >= x[..., 2:, :])
+    mask[..., -1, :] = x[..., -1, :] > x[..., -2, :]
+    return mask
+
+
+def piptrack(S: np.ndarray, sr: int, threshold: float = 0.1, fmin: float = 150.0,
+             fmax: float = 4000.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    在幅度谱的每一帧中寻找高于阈值的频谱峰，并用抛物线插值细化频率和幅度
+
+    Args:
+        S: 幅度谱 [shape=(..., 1 + n_fft // 2, n_frames)]
+        sr: 采样率
+        threshold: 相对于每帧最大幅度的峰值阈值
+        fmin: 最低频率（Hz）
+        fmax: 最高频率（Hz）
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (候选频率, 候选幅度)，形状与 S 相同，非峰值处为0
+    """
+    n_fft = 2 * (S.shape[-2] - 1)
+    fmin = max(fmin, 0)
+    fmax = min(fmax, float(sr) / 2)
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+
+    avg = np.gradient(S, axis=-2)
+    shift = _parabolic_shift(S)
+    dskew = 0.5 * avg * shift
+
+    # 只保留可行频率范围内、高于阈值的局部峰值
+    freq_mask = ((fmin <= fft_freqs) & (fft_freqs < fmax))[:, None]
+    ref_value = threshold * np.max(S, axis=-2, keepdims=True)
+    peaks = freq_mask & _local_extremum(S * (S > ref_value), maximum=True)
+
+    bins = np.arange(S.shape[-2])[:, None]
+    pitches = np.where(peaks, (bins + shift) * float(sr) / n_fft, 0).astype(S.dtype, copy=False)
+    mags = np.where(peaks, S + dskew, 0).astype(S.dtype, copy=False)
+    return pitches, mags
+
+
+@njit(cache=True)
+def _yin_periods(y: np.ndarray, acf_frames: np.ndarray, frame_length: int, hop_length: int,
+                 min_period: int, max_period: int, trough_threshold: float,
+                 period: np.ndarray):
+    """
+    由各帧的自相关逐帧计算YIN的差分函数、累积均值归一化差分函数、谷点搜索和抛物线插值
+    
+    每帧只在长度为 max_period 的小缓冲区上计算，不生成整个 (延迟, 帧) 的中间数组。
+    累加顺序和精度与 yin 的numpy实现相同，结果逐位一致。
+    
+    Args:
+        y: 两端已补零的信号（float32）
+        acf_frames: 各帧的自相关 [shape=(max_period + 1, n_frames)]（float32）
+        frame_length: 帧长度
+        hop_length: 帧移
+        min_period: 最小周期（采样点）
+        max_period: 最大周期（采样点）
+        trough_threshold: 谷值阈值
+        period: 输出的各帧周期（采样点，float64）
+    """
+    n_frames = acf_frames.shape[1]
+    n_lags = max_period - min_period + 1
+    tiny = np.finfo(np.float64).tiny
+    d = np.empty(max_period + 1, dtype=np.float32)
+    cmnd = np.empty(n_lags, dtype=np.float64)
+    for t in range(n_frames):
+        start = t * hop_length
+        acf0 = acf_frames[0, t]
+        
+        # 差分函数 d(k) = 2 * (ACF(0) - ACF(k)) - Σ_{m<k} y(m)²（单精度顺序累加，d(1)不减能量项）
+        energy = np.float32(0.0)
+        cumulative = np.float32(0.0)
+        for k in range(1, max_period + 1):
+            sample = y[start + k - 1]
+            energy += sample * sample
+            d[k] = np.float32(2.0) * (acf0 - acf_frames[k, t]) - (energy if k > 1 else np.float32(0.0))
+            cumulative += d[k]
+            if k >= min_period:
+                # 累积均值归一化差分函数
+                cmnd[k - min_period] = d[k] / (np.float64(cumulative) / k + tiny)
+        
+        # 低于阈值的第一个谷点，没有时取全局最小值
+        best = -1
+        for i in range(n_lags):
+            value = cmnd[i]
+            if i == 0:
+                is_trough = n_lags > 1 and value < cmnd[1]
+            elif i == n_lags - 1:
+                is_trough = value < cmnd[i - 1]
+            else:
+                is_trough = value < cmnd[i - 1] and value <= cmnd[i + 1]
+            if is_trough and value < trough_threshold:
+                best = i
+                break
+        if best < 0:
+            best = 0
+            for i in range(1, n_lags):
+                if cmnd[i] < cmnd[best]:
+                    best = i
+        
+        # 抛物线插值细化周期（与 _parabolic_shift 相同，首尾点不插值）
+        shift = 0.0
+        if 0 < best < n_lags - 1:
+            left = cmnd[best - 1]
+            right = cmnd[best + 1]
+            a = (right + left) - 2 * cmnd[best]
+            b = (right - left) / 2.0
+            if abs(b) < abs(a):
+                shift = -b / a
+        period[t] = min_period + best + shift
+
+
+def yin(y: np.ndarray, fmin: float, fmax: float, sr: int, frame_length: int = 2048,
+        hop_length: Optional[int] = None, trough_threshold: float = 0.1) -> np.ndarray:
+    """
+    YIN算法逐帧估计基音频率（帧居中，两端补零半帧）
+
+    Args:
+        y: 一维音频信号
+        fmin: 最低频率（Hz）
+        fmax: 最高频率（Hz）
+        sr: 采样率
+        frame_length: 帧长度
+        hop_length: 帧移，默认为 frame_length // 4
+        trough_threshold: 累积均值归一化差分函数的谷值阈值
+
+    Returns:
+        np.ndarray: 各帧的基音频率（Hz）
+    """
+    if hop_length is None:
+        hop_length = frame_length // 4
+
+    y = np.pad(y, frame_length // 2)
+    y_frames = frame(y, frame_length, hop_length)
+
+    min_period = int(np.floor(sr / fmax))
+    max_period = min(int(np.ceil(sr / fmin)), frame_length - 1)
+
+    # 各帧的自相关（FFT计算）
+    n_pad = next_fast_len(2 * frame_length - 1, real=True)
+    spectrum = rfft(y_frames, n=n_pad, axis=-2, workers=-1)
+    acf_frames = irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=n_pad, axis=-2,
+                       workers=-1)[..., :max_period + 1, :]
+    
+    # 单声道float32信号（分析流程的常见情况）由numba逐帧完成其余计算
+    if NUMBA_AVAILABLE and y.ndim == 1 and y.dtype == np.float32 and max_period > min_period:
+        period = np.empty(acf_frames.shape[-1], dtype=np.float64)
+        _yin_periods(y, np.ascontiguousarray(acf_frames), frame_length, hop_length,
+                     min_period, max_period, trough_threshold, period)
+        return sr / period
+
+    # 差分函数 d(k) = 2 * (ACF(0) - ACF(k)) - Σ_{m<k} y(m)²
+    yin_frames = np.cumsum(np.square(y_frames), axis=-2)
+    yin_frames[..., 0, :] = 0
+    yin_frames[..., 1:max_period + 1, :] = (
+        2 * (acf_frames[..., 0:1, :] - acf_frames[..., 1:max_period + 1, :])
+        - yin_frames[..., :max_period, :]
+    )
+
+    # 累积均值归一化差分函数
+    numerator = yin_frames[..., min_period:max_period + 1, :]
+    k_range = np.arange(1, max_period + 1)[:, None]
+    cumulative_mean = np.cumsum(yin_frames[..., 1:max_period + 1, :], axis=-2) / k_range
+    denominator = cumulative_mean[..., min_period - 1:max_period, :]
+    yin_frames = numerator / (denominator + np.finfo(denominator.dtype).tiny)
+
+    # 低于阈值的第一个谷点，没有时取全局最小值，再用抛物线插值细化周期
+    shifts = _parabolic_shift(yin_frames)
+    is_trough = _local_extremum(yin_frames, maximum=False)
+    is_trough[..., 0, :] = yin_frames[..., 0, :] < yin_frames[..., 1, :]
+    is_threshold_trough = is_trough & (yin_frames < trough_threshold)
+
+    period = np.argmax(is_threshold_trough, axis=-2)
+    no_trough = ~is_threshold_trough.any(axis=-2)
+    period[no_trough] = np.argmin(yin_frames, axis=-2)[no_trough]
+
+    period = (min_period + period
+              + np.take_along_axis(shifts, period[..., None, :], axis=-2)[..., 0, :])
+    return sr / period
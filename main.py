@@ -8,7 +8,7 @@
 import argparse
 import sys
 import os
-from typing import List
+from typing import List, Optional
 from audio_pitch_analyzer import AudioPitchAnalyzer
 from audio_utils import AudioUtils
 
@@ -103,8 +103,13 @@ def print_comparison_result(comparison: dict):
         print(f"  平均相似度: {seg_sim['avg_similarity']:.2f}")
         print(f"  匹配片段比例: {seg_sim['match_ratio']:.1%}")
 
-def main():
-    """主函数"""
+def main(argv: Optional[List[str]] = None):
+    """
+    主函数
+    
+    Args:
+        argv: 命令行参数（不含程序名），默认为 sys.argv[1:]
+    """
     parser = argparse.ArgumentParser(
         description="音频音调比较工具",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -196,7 +201,14 @@ def main():
         help='音程分析的帧大小（秒），默认0.1秒'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='并行分析的进程数（默认: 文件不少于3个时使用全部CPU核心，否则顺序分析）'
+    )
+    
+    args = parser.parse_args(argv)
     
     # 检查文件
     valid_files = []
@@ -253,13 +265,14 @@ def main():
                     continue
         
         elif args.analyze_only or len(valid_files) == 1:
-            # 仅分析模式
-            for file_path in valid_files:
+            # 仅分析模式（文件较多时并行分析，按输入顺序输出）
+            for file_path, result, error in analyzer.analyze_files(
+                    valid_files, method=args.method, start_time=args.start_time,
+                    end_time=args.end_time, max_workers=args.jobs):
                 try:
                     print(f"\n正在分析: {file_path}")
-                    result = analyzer.analyze_pitch(file_path, method=args.method,
-                                                   start_time=args.start_time,
-                                                   end_time=args.end_time)
+                    if error is not None:
+                        raise error
                     print_analysis_result(result, verbose=args.verbose)
                     
                     if args.visualize:
@@ -306,7 +319,8 @@ def main():
             try:
                 results = analyzer.compare_multiple_files(valid_files,
                                                          start_time=args.start_time,
-                                                         end_time=args.end_time)
+                                                         end_time=args.end_time,
+                                                         max_workers=args.jobs)
                 
                 # 打印每个文件的分析结果
                 if args.verbose:
@@ -343,6 +357,27 @@ def main():
     except Exception as e:
         print(f"程序执行出错: {e}")
         sys.exit(1)
+    finally:
+        # 可视化复用的图表在整个运行期间保持打开，结束时统一关闭
+        analyzer.close()
+
+def run(argv: Optional[List[str]] = None) -> int:
+    """
+    在当前进程中运行命令行程序（供测试调用，避免启动新的解释器）
+    
+    Args:
+        argv: 命令行参数（不含程序名）
+        
+    Returns:
+        int: 退出码，0表示成功
+    """
+    try:
+        main(argv)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
 
 if __name__ == "__main__":
     main()
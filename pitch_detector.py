@@ -1,87 +1,373 @@
+import math
 import numpy as np
-import librosa
-import matplotlib.pyplot as plt
-from scipy.signal import find_peaks
-from typing import Tuple, Optional
+import fast_audio
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import get_window
+from typing import Dict, List, Tuple, Optional
 import warnings
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba 为可选依赖，未安装时退回纯Python实现
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 warnings.filterwarnings('ignore')
 
+# 十二平均律音名
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+# MIDI音符编号（0~127）到音符名称的查找表，避免每次转换都格式化字符串
+MIDI_TO_NAME = tuple(f"{NOTE_NAMES[m % 12]}{m // 12 - 1}" for m in range(128))
+
+
+@njit(cache=True)
+def _frequencies_to_note_numbers(frequencies: np.ndarray, note_numbers: np.ndarray):
+    """
+    计算各频率相对于A4(440Hz, 音符编号69)的音符编号，无效频率（<=0、inf或nan）记为0
+    
+    Args:
+        frequencies: 频率数组（float64）
+        note_numbers: 输出的音符编号数组（int64），与 frequencies 等长
+    """
+    for i in range(frequencies.size):
+        f = frequencies[i]
+        # nan 在比较中恒为False；inf 无法转换为整数，需要一并排除
+        if f > 0 and f < np.inf:
+            note_numbers[i] = np.int64(np.rint(12.0 * np.log2(f / 440.0) + 69.0))
+        else:
+            note_numbers[i] = 0
+
+@njit(cache=True)
+def _strongest_autocorrelation_peak(correlation: np.ndarray, min_period: int,
+                                    max_period: int, threshold: float) -> float:
+    """
+    在 [min_period, max_period) 范围内寻找高度不低于阈值的最强局部极大值，并用抛物线插值细化到亚采样精度
+    
+    Args:
+        correlation: 非负延迟的自相关
+        min_period: 最小延迟（采样点）
+        max_period: 最大延迟（采样点，不含）
+        threshold: 峰值的最小高度
+        
+    Returns:
+        float: 细化后的延迟，未找到峰值时为0
+    """
+    best_lag = -1
+    best_height = 0.0
+    for i in range(min_period + 1, max_period - 1):
+        height = correlation[i]
+        if (height >= threshold and correlation[i - 1] < height
+                and height > correlation[i + 1]
+                and (best_lag < 0 or height > best_height)):
+            best_lag = i
+            best_height = height
+    
+    if best_lag < 0:
+        return 0.0
+    
+    left = correlation[best_lag - 1]
+    right = correlation[best_lag + 1]
+    return best_lag + 0.5 * (left - right) / (left - 2.0 * best_height + right)
+
+@njit(cache=True)
+def _piptrack_frame_peaks(S: np.ndarray, threshold: float, lo: int, hi: int,
+                          sr: float, n_fft: int, pitch: np.ndarray, magnitude: np.ndarray):
+    """
+    逐帧只保留piptrack中幅度最大的候选，结果与 fast_audio.piptrack 后按列取argmax相同
+    
+    只在 [lo, hi) 频率范围内高于阈值的局部峰值处做抛物线插值，
+    不必为所有频率bin生成完整的候选频率和幅度数组。算术精度与numpy实现逐位一致。
+    
+    Args:
+        S: 幅度谱 [shape=(batch, d, t)]（float32）
+        threshold: 相对于每帧最大幅度的峰值阈值
+        lo: 可行频率范围的起始bin
+        hi: 可行频率范围的结束bin（不含）
+        sr: 采样率
+        n_fft: FFT长度
+        pitch: 输出的各帧候选频率 [shape=(batch, t)]，没有峰值时为0
+        magnitude: 输出的各帧候选幅度 [shape=(batch, t)]，没有峰值时为0
+    """
+    n_batch, d, n_frames = S.shape
+    threshold32 = np.float32(threshold)
+    half = np.float32(0.5)
+    zero = np.float32(0.0)
+    for b in range(n_batch):
+        for t in range(n_frames):
+            ref = S[b, 0, t]
+            for i in range(1, d):
+                if S[b, i, t] > ref:
+                    ref = S[b, i, t]
+            ref = threshold32 * ref
+            
+            best = zero
+            best_bin = -1
+            best_shift = zero
+            for i in range(max(lo, 1), hi):
+                center = S[b, i, t]
+                if not center > ref:
+                    continue
+                left = S[b, i - 1, t]
+                # 低于阈值的点按0参与局部极大值判断
+                x_left = left if left > ref else zero
+                if not center > x_left:
+                    continue
+                if i < d - 1:
+                    right = S[b, i + 1, t]
+                    x_right = right if right > ref else zero
+                    if not center >= x_right:
+                        continue
+                    avg = (right - left) / np.float32(2.0)
+                    a = np.float64(right + left) - 2.0 * np.float64(center)
+                    c = np.float64(right - left) / 2.0
+                    shift = zero if abs(c) >= abs(a) else np.float32(-c / a)
+                else:
+                    avg = center - left
+                    shift = zero
+                mag = center + half * avg * shift
+                if mag > best:
+                    best = mag
+                    best_bin = i
+                    best_shift = shift
+            
+            if best_bin < 0:
+                pitch[b, t] = zero
+                magnitude[b, t] = zero
+            else:
+                pitch[b, t] = np.float32((best_bin + np.float64(best_shift)) * sr / n_fft)
+                magnitude[b, t] = best
+
 class PitchDetector:
     """音调检测器类"""
     
-    def __init__(self, sr: int = 22050, hop_length: int = 512):
+    # STFT窗口缓存，按窗口长度共享，避免每次调用重新生成
+    _WINDOW_CACHE: Dict[int, np.ndarray] = {}
+    
+    # 分块计算STFT时每块的内存预算（字节），与 librosa.util.MAX_MEM_BLOCK 相同
+    MAX_MEM_BLOCK = 2**8 * 2**10
+    
+    # 十二平均律音名
+    NOTE_NAMES = NOTE_NAMES
+    
+    def __init__(self, sr: int = 22050, hop_length: int = 512,
+                 fmin: float = 80.0, fmax: float = 2000.0):
         """
         初始化音调检测器
         
         Args:
             sr: 采样率
             hop_length: 帧移长度
+            fmin: 检测的最低频率（Hz）
+            fmax: 检测的最高频率（Hz），搜索范围越窄检测越快
         """
+        if not 0 < fmin < fmax:
+            raise ValueError(f"频率范围无效: fmin={fmin}, fmax={fmax}")
+        
         self.sr = sr
         self.hop_length = hop_length
+        self.fmin = fmin
+        self.fmax = fmax
+        
+        # 各采样率对应的周期搜索范围，检测时反复使用，只计算一次
+        self._period_ranges: Dict[int, Tuple[int, int]] = {}
+        self._period_range(sr)
+        # 预先生成默认帧长的分析窗口
+        self._get_window(2048)
     
-    def detect_fundamental_frequency(self, y: np.ndarray) -> Tuple[float, float]:
+    def _period_range(self, sr: int) -> Tuple[int, int]:
         """
-        检测音频的基音频率
+        返回给定采样率下的周期搜索范围（采样点）
         
         Args:
-            y: 音频信号数组
+            sr: 信号采样率
             
         Returns:
-            Tuple[float, float]: (基音频率, 置信度)
+            Tuple[int, int]: (最小周期, 最大周期)，分别对应 fmax 和 fmin
         """
-        # 使用librosa的piptrack进行基音检测
-        pitches, magnitudes = librosa.piptrack(
-            y=y, 
-            sr=self.sr, 
-            hop_length=self.hop_length,
-            threshold=0.1,
-            fmin=80,   # 最低频率80Hz
-            fmax=2000  # 最高频率2000Hz
-        )
+        period_range = self._period_ranges.get(sr)
+        if period_range is None:
+            period_range = (int(sr / self.fmax), int(sr / self.fmin))
+            self._period_ranges[sr] = period_range
+        return period_range
+    
+    @classmethod
+    def _get_window(cls, n_fft: int) -> np.ndarray:
+        """
+        获取缓存的Hann窗口
         
-        # 提取最强的基音
-        fundamental_frequencies = []
-        confidences = []
+        Args:
+            n_fft: 窗口长度
+            
+        Returns:
+            np.ndarray: 周期Hann窗口（float32）
+        """
+        window = cls._WINDOW_CACHE.get(n_fft)
+        if window is None:
+            window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+            cls._WINDOW_CACHE[n_fft] = window
+        return window
+    
+    def compute_spectrogram(self, y: np.ndarray, n_fft: int = 2048) -> np.ndarray:
+        """
+        计算幅度谱，可在piptrack与可视化之间共享
         
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            confidence = magnitudes[index, t]
+        Args:
+            y: 音频信号数组，也可以是沿最后一维排列的多段信号 [shape=(..., n_samples)]
+            n_fft: FFT窗口长度
             
-            if pitch > 0:
-                fundamental_frequencies.append(pitch)
-                confidences.append(confidence)
+        Returns:
+            np.ndarray: 幅度谱 [shape=(..., 1 + n_fft // 2, n_frames)]
+        """
+        # 与 librosa.stft(center=True) 一致：两端补零半个窗口后分帧
+        padding = [(0, 0)] * (y.ndim - 1) + [(n_fft // 2, n_fft // 2)]
+        y_padded = np.pad(y, padding, mode='constant')
+        frames = fast_audio.frame(y_padded, frame_length=n_fft, hop_length=self.hop_length)
+        window = self._get_window(n_fft)[:, None]
+        
+        n_bins = 1 + n_fft // 2
+        n_frames = frames.shape[-1]
+        out_dtype = np.result_type(y.dtype, np.float32)
+        S = np.empty(y.shape[:-1] + (n_bins, n_frames), dtype=out_dtype)
+        
+        # 按内存预算分块处理，避免长音频一次性生成完整的复数频谱矩阵
+        complex_itemsize = 2 * np.dtype(out_dtype).itemsize
+        n_columns = max(1, self.MAX_MEM_BLOCK // (S[..., :1].size * complex_itemsize))
+        for bl_s in range(0, n_frames, n_columns):
+            bl_t = min(bl_s + n_columns, n_frames)
+            # 实数信号只需计算非负频率部分
+            S[..., bl_s:bl_t] = np.abs(rfft(window * frames[..., bl_s:bl_t], axis=-2, workers=-1))
+        
+        return S
+    
+    def _frame_peaks(self, S: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        piptrack的逐帧结果：每帧只保留幅度最大的候选
         
-        if not fundamental_frequencies:
-            return 0.0, 0.0
+        安装numba时只在候选峰值处插值（见 _piptrack_frame_peaks），
+        否则计算完整的piptrack再按列取最大值，两者结果相同。
+        
+        Args:
+            S: 幅度谱 [shape=(..., d, t)]
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (各帧候选频率, 各帧候选幅度) [shape=(..., t)]，无峰值的帧为0
+        """
+        if not NUMBA_AVAILABLE or S.dtype != np.float32:
+            pitches, magnitudes = fast_audio.piptrack(
+                S,
+                sr=self.sr,
+                threshold=0.1,
+                fmin=self.fmin,
+                fmax=self.fmax
+            )
+            index = magnitudes.argmax(axis=-2)[..., None, :]
+            return (np.take_along_axis(pitches, index, axis=-2)[..., 0, :],
+                    np.take_along_axis(magnitudes, index, axis=-2)[..., 0, :])
+        
+        # 与 fast_audio.piptrack 相同的可行频率范围 [fmin, fmax)
+        n_fft = 2 * (S.shape[-2] - 1)
+        fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / self.sr)
+        in_range = np.flatnonzero((max(self.fmin, 0) <= fft_freqs)
+                                  & (fft_freqs < min(self.fmax, float(self.sr) / 2)))
+        lo, hi = (int(in_range[0]), int(in_range[-1]) + 1) if len(in_range) else (0, 0)
+        
+        S3 = S.reshape((-1,) + S.shape[-2:])
+        pitch = np.empty((S3.shape[0], S3.shape[-1]), dtype=np.float32)
+        magnitude = np.empty_like(pitch)
+        _piptrack_frame_peaks(S3, 0.1, lo, hi, float(self.sr), n_fft, pitch, magnitude)
+        shape = S.shape[:-2] + S.shape[-1:]
+        return pitch.reshape(shape), magnitude.reshape(shape)
+    
+    @staticmethod
+    def _aggregate_piptrack(pitch: np.ndarray,
+                            magnitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        汇总piptrack结果：按幅度加权平均每帧最强候选的频率
         
-        # 计算加权平均基音频率
-        fundamental_frequencies = np.array(fundamental_frequencies)
-        confidences = np.array(confidences)
+        Args:
+            pitch: 各帧候选频率 [shape=(..., t)]（见 _frame_peaks）
+            magnitude: 各帧候选幅度 [shape=(..., t)]
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (加权平均频率, 平均置信度) [shape=(...)]，无有效帧时为0
+        """
+        voiced = pitch > 0
+        weights = np.where(voiced, magnitude, 0).astype(np.float64)
+        count = voiced.sum(axis=-1)
+        weight_sum = weights.sum(axis=-1)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frequency = np.where(count > 0, (weights * pitch).sum(axis=-1) / weight_sum, 0.0)
+            confidence = np.where(count > 0, weight_sum / count, 0.0)
+        return frequency, confidence
+    
+    def track_fundamental_frequency(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量检测多个分析帧的基音频率，结果与逐帧调用 detect_fundamental_frequency 相同
         
-        weighted_frequency = np.average(fundamental_frequencies, weights=confidences)
-        avg_confidence = np.mean(confidences)
+        Args:
+            frames: 分析帧 [shape=(n_frames, frame_length)]
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (各帧基音频率, 各帧置信度)
+        """
+        if len(frames) == 0:
+            return np.zeros(0), np.zeros(0)
+        
+        # 所有帧的幅度谱和piptrack一次性计算，避免逐帧调用的开销
+        S = self.compute_spectrogram(frames)
+        return self._aggregate_piptrack(*self._frame_peaks(S))
+    
+    def detect_fundamental_frequency(self, y: np.ndarray,
+                                     S: Optional[np.ndarray] = None,
+                                     acf: Optional[np.ndarray] = None) -> Tuple[float, float]:
+        """
+        检测音频的基音频率
+        
+        Args:
+            y: 音频信号数组
+            S: 预先计算的幅度谱（可选，提供时不再重复计算STFT）
+            acf: 未使用，保持与其他检测方法一致的调用方式
+            
+        Returns:
+            Tuple[float, float]: (基音频率, 置信度)
+        """
+        # 使用piptrack进行基音检测（未提供幅度谱时先计算STFT）
+        if S is None:
+            S = self.compute_spectrogram(y)
+        
+        # 提取每帧最强的基音并加权平均（与 track_fundamental_frequency 共用）
+        weighted_frequency, avg_confidence = self._aggregate_piptrack(*self._frame_peaks(S))
         
         return float(weighted_frequency), float(avg_confidence)
     
-    def detect_pitch_yin(self, y: np.ndarray) -> float:
+    def detect_pitch_yin(self, y: np.ndarray, acf: Optional[np.ndarray] = None,
+                         sr: Optional[int] = None) -> float:
         """
         使用YIN算法检测音调
         
         Args:
             y: 音频信号数组
+            acf: 未使用（YIN需要逐帧的自相关），保持与其他检测方法一致的调用方式
+            sr: y 的采样率（可选，默认为检测器采样率；用于降采样后的信号）
             
         Returns:
             float: 基音频率
         """
-        # 使用librosa的yin算法
-        f0 = librosa.yin(
+        sr = sr or self.sr
+        
+        # 使用YIN算法逐帧估计
+        f0 = fast_audio.yin(
             y, 
-            fmin=80, 
-            fmax=2000,
-            sr=self.sr,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            sr=sr,
             hop_length=self.hop_length
         )
         
@@ -92,66 +378,203 @@ class PitchDetector:
         
         return float(np.median(f0_filtered))
     
-    def autocorrelation_pitch(self, y: np.ndarray) -> float:
+    def compute_autocorrelation(self, y: np.ndarray) -> np.ndarray:
+        """
+        基于FFT计算信号的自相关（Wiener–Khinchin定理），可在多种检测方法之间共享
+        
+        Args:
+            y: 音频信号数组
+            
+        Returns:
+            np.ndarray: 非负延迟的自相关 r[0..len(y)-1]
+        """
+        # 补零到不小于 2N-1 的快速FFT长度（5-smooth，通常比2的幂更短），得到线性（而非循环）自相关
+        n = next_fast_len(2 * len(y) - 1, real=True)
+        spectrum = rfft(y, n, workers=-1)
+        return irfft(spectrum * np.conj(spectrum), n, workers=-1)[:len(y)]
+    
+    def autocorrelation_pitch(self, y: np.ndarray,
+                              acf: Optional[np.ndarray] = None,
+                              sr: Optional[int] = None) -> float:
         """
         使用自相关方法检测音调
         
         Args:
             y: 音频信号数组
+            acf: 预先计算的自相关（可选，见 compute_autocorrelation）
+            sr: y 的采样率（可选，默认为检测器采样率；用于降采样后的信号）
             
         Returns:
             float: 基音频率
         """
-        # 归一化音频信号
-        y = y / np.max(np.abs(y))
-        
-        # 计算自相关
-        correlation = np.correlate(y, y, mode='full')
-        correlation = correlation[len(correlation)//2:]
+        sr = sr or self.sr
+        if acf is not None:
+            correlation = acf
+        else:
+            # 基于FFT计算自相关；峰值阈值相对于最大值，无需预先归一化信号
+            correlation = self.compute_autocorrelation(y)
         
         # 寻找自相关峰值
-        min_period = int(self.sr / 2000)  # 最小周期对应最高频率2000Hz
-        max_period = int(self.sr / 80)    # 最大周期对应最低频率80Hz
+        min_period, max_period = self._period_range(sr)
         
         if max_period >= len(correlation):
             return 0.0
         
-        # 在有效范围内寻找峰值
-        peaks, _ = find_peaks(
-            correlation[min_period:max_period], 
-            height=0.1 * np.max(correlation)
-        )
+        # 在有效范围内寻找最强的峰值（安装numba时编译为机器码）
+        # 自相关在零延迟处取最大值 r[0] = Σy²，峰值阈值直接由它得到，无需再扫描整个数组
+        period = _strongest_autocorrelation_peak(
+            correlation, min_period, max_period, 0.1 * correlation[0])
         
-        if len(peaks) == 0:
+        if period <= 0:
             return 0.0
         
-        # 选择最强的峰值
-        peak_heights = correlation[min_period:max_period][peaks]
-        strongest_peak_idx = peaks[np.argmax(peak_heights)]
-        period = strongest_peak_idx + min_period
-        
-        frequency = self.sr / period
+        frequency = sr / period
         return float(frequency)
     
-    def detect_pitch_multi_method(self, y: np.ndarray) -> Tuple[float, float]:
+    def detect_pitch_multi_method(self, y: np.ndarray,
+                                  S: Optional[np.ndarray] = None,
+                                  acf: Optional[np.ndarray] = None,
+                                  y_lag: Optional[np.ndarray] = None,
+                                  lag_sr: Optional[int] = None) -> Tuple[float, float]:
         """
         使用多种方法检测音调并返回最可靠的结果
         
         Args:
             y: 音频信号数组
+            S: 预先计算的幅度谱（可选，未提供时由 compute_spectrogram 计算）
+            acf: 预先计算的自相关（可选，供自相关方法使用，须由 y_lag 计算；
+                 未提供时由 compute_autocorrelation 计算）
+            y_lag: 供YIN和自相关方法使用的降采样信号（可选，默认为 y）
+            lag_sr: y_lag 的采样率（可选，默认为检测器采样率）
             
         Returns:
             Tuple[float, float]: (基音频率, 置信度)
         """
+        if y_lag is None:
+            y_lag = y
+        
+        # 调用方未提供时在此各计算一次：幅度谱供piptrack使用，自相关供自相关方法使用
+        if S is None:
+            S = self.compute_spectrogram(y)
+        if acf is None:
+            acf = self.compute_autocorrelation(y_lag)
+        
         # 方法1: piptrack
-        freq1, conf1 = self.detect_fundamental_frequency(y)
+        freq1, conf1 = self.detect_fundamental_frequency(y, S=S)
         
-        # 方法2: YIN算法
-        freq2 = self.detect_pitch_yin(y)
+        # 方法2: YIN算法（逐帧估计取中位数，对音高变化的音频更稳健）
+        freq2 = self.detect_pitch_yin(y_lag, sr=lag_sr)
         
         # 方法3: 自相关
-        freq3 = self.autocorrelation_pitch(y)
+        freq3 = self.autocorrelation_pitch(y_lag, acf=acf, sr=lag_sr)
+        
+        return self._combine_estimates(freq1, conf1, freq2, freq3)
+    
+    def detect_segments_multi_method(self, y: np.ndarray, segments: List[Tuple[float, float]],
+                                     S: Optional[np.ndarray] = None,
+                                     y_lag: Optional[np.ndarray] = None,
+                                     lag_sr: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        一次性检测多个片段的音调：piptrack和YIN只对整段信号逐帧计算一次，
+        再按时间范围汇总属于各片段的帧，避免每个片段重复计算
+        
+        Args:
+            y: 完整的音频信号数组
+            segments: 片段时间范围列表 [(开始时间, 结束时间), ...]（秒）
+            S: y 的幅度谱（可选，提供时不再重复计算STFT）
+            y_lag: 供YIN和自相关方法使用的降采样信号（可选，默认为 y）
+            lag_sr: y_lag 的采样率（可选，默认为检测器采样率）
+            
+        Returns:
+            List[Tuple[float, float]]: 各片段的 (基音频率, 置信度)
+        """
+        if y_lag is None:
+            y_lag = y
+        lag_sr = lag_sr or self.sr
+        if not segments:
+            return []
+        
+        # 只计算覆盖所有片段的时间范围，片段通常只占长音频的一小部分
+        span_start = min(start for start, _ in segments)
+        span_end = max(end for _, end in segments)
+        
+        # piptrack：每帧取幅度最大的候选
+        if S is None:
+            first = int(span_start * self.sr)
+            y_span = y[first:int(np.ceil(span_end * self.sr)) + 1]
+            S = self.compute_spectrogram(y_span)
+            frame_offset = first / self.sr
+        else:
+            first_column = max(0, int(span_start * self.sr / self.hop_length))
+            last_column = int(np.ceil(span_end * self.sr / self.hop_length)) + 1
+            S = S[:, first_column:last_column]
+            frame_offset = first_column * self.hop_length / self.sr
+        frame_pitches, frame_magnitudes = self._frame_peaks(S)
+        pitch_times = frame_offset + np.arange(len(frame_pitches)) * self.hop_length / self.sr
+        
+        # YIN：逐帧估计
+        first = int(span_start * lag_sr)
+        f0 = fast_audio.yin(
+            y_lag[first:int(np.ceil(span_end * lag_sr)) + 1],
+            fmin=self.fmin,
+            fmax=self.fmax,
+            sr=lag_sr,
+            hop_length=self.hop_length
+        )
+        yin_times = first / lag_sr + np.arange(len(f0)) * self.hop_length / lag_sr
+        
+        # 帧时间单调递增，用二分查找一次得到各片段的帧范围和采样范围（均为切片视图）
+        bounds = np.asarray(segments, dtype=np.float64)
+        pitch_ranges = np.stack([np.searchsorted(pitch_times, bounds[:, 0], side='left'),
+                                 np.searchsorted(pitch_times, bounds[:, 1], side='right')], axis=1)
+        yin_ranges = np.stack([np.searchsorted(yin_times, bounds[:, 0], side='left'),
+                               np.searchsorted(yin_times, bounds[:, 1], side='right')], axis=1)
+        sample_ranges = (bounds * lag_sr).astype(np.int64)
+        
+        results = []
+        for (p0, p1), (y0, y1), (s0, s1) in zip(pitch_ranges.tolist(), yin_ranges.tolist(),
+                                                sample_ranges.tolist()):
+            # 方法1: 片段内piptrack帧的加权平均
+            seg_pitches = frame_pitches[p0:p1]
+            voiced = seg_pitches > 0
+            if voiced.any():
+                seg_magnitudes = frame_magnitudes[p0:p1][voiced]
+                freq1 = float(np.average(seg_pitches[voiced], weights=seg_magnitudes))
+                conf1 = float(np.mean(seg_magnitudes))
+            else:
+                freq1, conf1 = 0.0, 0.0
+            
+            # 方法2: 片段内YIN帧的中位数
+            seg_f0 = f0[y0:y1]
+            seg_f0 = seg_f0[seg_f0 > 0]
+            freq2 = float(np.median(seg_f0)) if len(seg_f0) > 0 else 0.0
+            
+            # 方法3: 片段的自相关（通过FFT计算）
+            segment_lag = y_lag[max(s0, 0):s1]
+            freq3 = 0.0
+            if len(segment_lag) > 0:
+                freq3 = self.autocorrelation_pitch(
+                    segment_lag, acf=self.compute_autocorrelation(segment_lag), sr=lag_sr)
+            
+            results.append(self._combine_estimates(freq1, conf1, freq2, freq3))
+        
+        return results
+    
+    @staticmethod
+    def _combine_estimates(freq1: float, conf1: float, freq2: float,
+                           freq3: float) -> Tuple[float, float]:
+        """
+        综合piptrack、YIN和自相关三种方法的结果
         
+        Args:
+            freq1: piptrack检测的频率
+            conf1: piptrack检测的置信度
+            freq2: YIN检测的频率
+            freq3: 自相关检测的频率
+            
+        Returns:
+            Tuple[float, float]: (基音频率, 置信度)
+        """
         # 收集有效的频率结果
         frequencies = []
         if freq1 > 0:
@@ -197,16 +620,37 @@ class PitchDetector:
         if frequency <= 0:
             return "Unknown"
         
-        # A4 = 440Hz
-        A4_freq = 440.0
-        A4_note_number = 69
-        
-        # 计算相对于A4的半音数
-        note_number = round(12 * np.log2(frequency / A4_freq) + A4_note_number)
+        # 计算相对于A4（440Hz，MIDI 69）的半音数；标量用math比numpy的ufunc调用快得多
+        note_number = round(12 * math.log2(frequency / 440.0) + 69)
         
-        # 音符名称
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+        # 常用范围直接查表，超出MIDI范围时再格式化
+        if 0 <= note_number < len(MIDI_TO_NAME):
+            return MIDI_TO_NAME[note_number]
         octave = (note_number - 12) // 12
-        note_name = note_names[note_number % 12]
+        note_name = self.NOTE_NAMES[note_number % 12]
         
         return f"{note_name}{octave}"
+    
+    def frequencies_to_notes(self, frequencies: np.ndarray, unknown: str = "Unknown") -> List[str]:
+        """
+        批量将频率转换为音符名称，有限的频率与逐个调用 frequency_to_note 结果相同
+        
+        Args:
+            frequencies: 频率数组
+            unknown: 无效频率（<=0、inf或nan）对应的名称
+            
+        Returns:
+            List[str]: 音符名称列表
+        """
+        frequencies = np.ascontiguousarray(frequencies, dtype=np.float64)
+        valid = np.isfinite(frequencies) & (frequencies > 0)
+        
+        # 一次遍历计算所有频率的音符编号（安装numba时编译为机器码）
+        note_numbers = np.empty(len(frequencies), dtype=np.int64)
+        _frequencies_to_note_numbers(frequencies, note_numbers)
+        
+        names = self.NOTE_NAMES
+        n_midi = len(MIDI_TO_NAME)
+        return [(MIDI_TO_NAME[n] if 0 <= n < n_midi else f"{names[n % 12]}{n // 12 - 1}")
+                if v else unknown
+                for n, v in zip(note_numbers.tolist(), valid.tolist())]
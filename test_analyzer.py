@@ -4,85 +4,96 @@
 测试音频音调分析功能
 """
 
+import sys
 import numpy as np
-import soundfile as sf
 from audio_pitch_analyzer import AudioPitchAnalyzer
-import os
 
-def create_test_audio(frequency, duration=2, sr=22050, filename="test_audio.wav"):
-    """创建测试音频文件"""
-    t = np.linspace(0, duration, int(sr * duration))
-    # 生成正弦波
-    audio = 0.5 * np.sin(2 * np.pi * frequency * t)
-    
-    # 保存为WAV文件
-    sf.write(filename, audio, sr)
-    print(f"创建测试音频: {filename}, 频率: {frequency} Hz")
-    return filename
+def make_sine(frequency, duration=2, sr=22050):
+    """在内存中生成测试用正弦波（float32）"""
+    n_samples = int(sr * duration)
+    # 相位直接在float32缓冲区中计算（采样时刻与 np.linspace(0, duration, n_samples) 相同）
+    audio = np.arange(n_samples, dtype=np.float32)
+    audio *= np.float32(2 * np.pi * frequency * duration / max(n_samples - 1, 1))
+    np.sin(audio, out=audio)
+    audio *= np.float32(0.5)
+    return audio
 
-def test_pitch_analysis():
-    """测试音调分析功能"""
-    print("开始测试音频音调分析功能...\n")
+def test_pitch_analysis(shared_analyzer):
+    """测试音调分析功能（shared_analyzer 为共用的分析器，见 conftest.py）"""
+    # 输出先收集起来，最后一次性写出，避免每行都单独刷新stdout
+    lines = []
+    lines.append("开始测试音频音调分析功能...\n")
     
-    # 创建测试音频文件
-    test_files = []
+    # 测试音频直接在内存中生成并分析，无需写入和解码WAV文件
+    sr = 22050
     frequencies = [440, 523.25, 440]  # A4, C5, A4 (第三个和第一个相同)
     notes = ["A4", "C5", "A4"]
+    names = [f"test_{note.replace('#', 'sharp')}" for note in notes]
     
-    for i, (freq, note) in enumerate(zip(frequencies, notes)):
-        filename = f"test_{note.replace('#', 'sharp')}.wav"
-        create_test_audio(freq, duration=1, filename=filename)
-        test_files.append(filename)
-    
-    # 初始化分析器
-    analyzer = AudioPitchAnalyzer(tolerance=0.05)
+    analyzer = shared_analyzer
     
-    # 分析每个文件
+    # 分析每个信号
     results = []
-    for file in test_files:
-        try:
-            result = analyzer.analyze_pitch(file, method='multi')
-            results.append(result)
-            
-            pitch = result['overall_pitch']
-            print(f"文件: {file}")
-            print(f"  检测频率: {pitch['frequency']:.2f} Hz")
-            print(f"  检测音符: {pitch['note']}")
-            print(f"  置信度: {pitch['confidence']:.2f}\n")
-            
-        except Exception as e:
-            print(f"分析文件 {file} 时出错: {e}")
+    for name, freq in zip(names, frequencies):
+        result = analyzer.analyze_pitch_array(make_sine(freq, duration=1, sr=sr), sr, method='multi')
+        results.append(result)
+        
+        pitch = result['overall_pitch']
+        lines.append(f"信号: {name} ({freq} Hz)")
+        lines.append(f"  检测频率: {pitch['frequency']:.2f} Hz")
+        lines.append(f"  检测音符: {pitch['note']}")
+        lines.append(f"  置信度: {pitch['confidence']:.2f}\n")
     
     # 测试比较功能
     if len(results) >= 2:
-        print("=" * 50)
-        print("测试音调比较功能")
-        print("=" * 50)
+        lines.append("=" * 50)
+        lines.append("测试音调比较功能")
+        lines.append("=" * 50)
         
         # 比较第一个和第二个文件（不同音调）
         comparison1 = analyzer.compare_pitches(results[0], results[1])
-        print(f"比较 {results[0]['file_name']} vs {results[1]['file_name']}:")
-        print(f"  音调是否相同: {comparison1['is_same_pitch']}")
-        print(f"  频率差异: {comparison1['frequency_difference']:.2f} Hz")
-        print(f"  相对误差: {comparison1['relative_error']:.1%}\n")
+        lines.append(f"比较 {names[0]} vs {names[1]}:")
+        lines.append(f"  音调是否相同: {comparison1['is_same_pitch']}")
+        lines.append(f"  频率差异: {comparison1['frequency_difference']:.2f} Hz")
+        lines.append(f"  相对误差: {comparison1['relative_error']:.1%}\n")
         
         # 比较第一个和第三个文件（相同音调）
         if len(results) >= 3:
             comparison2 = analyzer.compare_pitches(results[0], results[2])
-            print(f"比较 {results[0]['file_name']} vs {results[2]['file_name']}:")
-            print(f"  音调是否相同: {comparison2['is_same_pitch']}")
-            print(f"  频率差异: {comparison2['frequency_difference']:.2f} Hz")
-            print(f"  相对误差: {comparison2['relative_error']:.1%}\n")
+            lines.append(f"比较 {names[0]} vs {names[2]}:")
+            lines.append(f"  音调是否相同: {comparison2['is_same_pitch']}")
+            lines.append(f"  频率差异: {comparison2['frequency_difference']:.2f} Hz")
+            lines.append(f"  相对误差: {comparison2['relative_error']:.1%}\n")
     
-    # 清理测试文件
-    for file in test_files:
-        try:
-            os.remove(file)
-            print(f"清理测试文件: {file}")
-        except:
-            pass
+    sys.stdout.write("\n".join(lines) + "\n")
     
-    print("\n测试完成！")
+    # 每个信号都应检测为生成时的音符
+    for name, note, result in zip(names, notes, results):
+        assert result['overall_pitch']['note'] == note, f"{name}: {result['overall_pitch']['note']}"
+    # 不同音调判定为不同，相同音调判定为相同
+    assert not comparison1['is_same_pitch']
+    assert comparison2['is_same_pitch']
+
+def test_segment_similarity(shared_analyzer):
+    """测试片段级相似性统计"""
+    analyzer = shared_analyzer
+    result1 = {'segment_pitches': [{'frequency': 440.0}, {'frequency': 0.0}, {'frequency': 523.25}]}
+    result2 = {'segment_pitches': [{'frequency': 441.0}, {'frequency': 660.0}]}
+    
+    similarity = analyzer._analyze_segment_similarity(result1, result2)
+    
+    # 频率为0的片段不参与比较
+    assert similarity['total_comparisons'] == 4
+    # 只有 440 vs 441 在容差范围内
+    assert similarity['matching_segments'] == 1
+    assert abs(similarity['match_ratio'] - 0.25) < 1e-9
+    
+    expected = np.mean([1 - abs(f1 - f2) / max(f1, f2)
+                        for f1 in (440.0, 523.25) for f2 in (441.0, 660.0)])
+    assert abs(similarity['avg_similarity'] - expected) < 1e-9
+    print("片段相似性测试通过")
 
 if __name__ == "__main__":
-    test_pitch_analysis()
+    analyzer = AudioPitchAnalyzer(tolerance=0.05)
+    test_pitch_analysis(analyzer)
+    test_segment_similarity(analyzer)
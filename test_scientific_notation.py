@@ -4,9 +4,31 @@
 测试科学音高记号法的音程分析功能
 """
 
+# 测试在无界面环境下运行，先固定使用非交互的 Agg 后端，避免 pyplot 首次导入时探测 GUI 后端
+import matplotlib
+matplotlib.use('Agg')
+
 import os
 import sys
-from audio_pitch_analyzer import AudioPitchAnalyzer
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+def analysis_params(test_file):
+    """确定分析时间范围和帧大小，返回 (开始时间, 结束时间, 帧大小)"""
+    if "scale" in test_file:
+        return 0, 4, 0.1
+    elif "changing" in test_file:
+        return 0, 5, 0.05
+    else:
+        # 纯音（如sample_A4）音高稳定，用较粗的帧即可确定音高，减少需要分析的帧数
+        return 0, 3, 0.5
+
+def analyze_contour(test_file):
+    """分析单个文件的音程变化（在进程池的工作进程中运行）"""
+    from audio_pitch_analyzer import AudioPitchAnalyzer
+    start_time, end_time, frame_size = analysis_params(test_file)
+    analyzer = AudioPitchAnalyzer(sr=22050)
+    return analyzer.analyze_pitch_contour(test_file, start_time, end_time, frame_size)
 
 def test_scientific_notation():
     """测试科学音高记号法显示"""
@@ -22,67 +44,66 @@ def test_scientific_notation():
     
     if not available_files:
         print("未找到测试文件，创建测试样本...")
-        os.system("python create_complex_samples.py")
+        from create_complex_samples import create_all
+        create_all()
         available_files = [f for f in test_files if os.path.exists(f)]
     
-    if not available_files:
-        print("无法创建测试文件")
-        return False
+    assert available_files, "无法创建测试文件"
     
+    # 分析器（及其依赖的scipy、numba等）只在确实需要分析时才导入
+    from audio_pitch_analyzer import AudioPitchAnalyzer
     analyzer = AudioPitchAnalyzer(sr=22050)
     
     print("🎵 科学音高记号法音程分析测试")
     print("=" * 60)
     
-    for test_file in available_files:
-        print(f"\n📁 分析文件: {test_file}")
+    failures = []
+    
+    # 各文件的音程分析互不依赖，先全部提交到进程池并行计算，绘图仍在主进程中进行
+    with ProcessPoolExecutor(max_workers=min(len(available_files), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(analyze_contour, test_file) for test_file in available_files]
         
-        try:
-            # 确定分析时间范围
-            if "scale" in test_file:
-                start_time, end_time = 0, 4
-                frame_size = 0.1
-            elif "changing" in test_file:
-                start_time, end_time = 0, 5
-                frame_size = 0.05
-            else:
-                start_time, end_time = 0, 3
-                frame_size = 0.1
-            
-            print(f"⏱️  时间范围: {start_time}s - {end_time}s (帧大小: {frame_size}s)")
-            
-            # 分析音程变化
-            contour_result = analyzer.analyze_pitch_contour(
-                test_file, start_time, end_time, frame_size)
-            
-            # 显示基本统计
-            stats = contour_result['statistics']
-            print(f"📊 统计信息:")
-            print(f"   平均频率: {stats['avg_frequency']:.1f} Hz")
-            print(f"   音程范围: {stats['interval_range']:.1f} 半音")
-            print(f"   最高音程: +{stats['max_interval']:.1f} 半音")
-            print(f"   最低音程: {stats['min_interval']:.1f} 半音")
-            print(f"   置信度: {stats['avg_confidence']:.2f}")
-            
-            # 生成科学音高记号法图表
-            save_path = f"{os.path.splitext(test_file)[0]}_scientific_notation.png"
-            analyzer.visualize_pitch_contour(contour_result, save_path)
-            print(f"🎨 科学音高记号法图表已保存: {save_path}")
-            
-            # 显示部分音符数据
-            data = contour_result['analysis_data']
-            notes = data['notes']
-            valid_notes = [note for note in notes if note != 'Silent']
-            
-            if valid_notes:
-                unique_notes = sorted(list(set(valid_notes)))
-                print(f"🎼 检测到的音符: {', '.join(unique_notes[:10])}")
-                if len(unique_notes) > 10:
-                    print(f"   ... 共 {len(unique_notes)} 个不同音符")
+        for test_file, future in zip(available_files, futures):
+            print(f"\n📁 分析文件: {test_file}")
             
-        except Exception as e:
-            print(f"❌ 分析失败: {e}")
-            continue
+            try:
+                start_time, end_time, frame_size = analysis_params(test_file)
+                print(f"⏱️  时间范围: {start_time}s - {end_time}s (帧大小: {frame_size}s)")
+                
+                # 分析音程变化
+                contour_result = future.result()
+                
+                # 显示基本统计
+                stats = contour_result['statistics']
+                print(f"📊 统计信息:")
+                print(f"   平均频率: {stats['avg_frequency']:.1f} Hz")
+                print(f"   音程范围: {stats['interval_range']:.1f} 半音")
+                print(f"   最高音程: +{stats['max_interval']:.1f} 半音")
+                print(f"   最低音程: {stats['min_interval']:.1f} 半音")
+                print(f"   置信度: {stats['avg_confidence']:.2f}")
+                
+                # 生成科学音高记号法图表
+                save_path = f"{os.path.splitext(test_file)[0]}_scientific_notation.png"
+                analyzer.visualize_pitch_contour(contour_result, save_path)
+                print(f"🎨 科学音高记号法图表已保存: {save_path}")
+                
+                # 显示部分音符数据
+                data = contour_result['analysis_data']
+                notes = np.asarray(data['notes'])
+                # np.unique 一次完成排序和去重
+                unique_notes = np.unique(notes[notes != 'Silent']).tolist()
+                
+                if unique_notes:
+                    print(f"🎼 检测到的音符: {', '.join(unique_notes[:10])}")
+                    if len(unique_notes) > 10:
+                        print(f"   ... 共 {len(unique_notes)} 个不同音符")
+                else:
+                    failures.append((test_file, "未检测到任何音符"))
+                
+            except Exception as e:
+                print(f"❌ 分析失败: {e}")
+                failures.append((test_file, e))
+                continue
     
     print(f"\n✅ 科学音高记号法测试完成!")
     print(f"📝 改进说明:")
@@ -91,7 +112,7 @@ def test_scientific_notation():
     print(f"   • 更清晰的音程参考线")
     print(f"   • 适应性的音符标记范围")
     
-    return True
+    assert not failures, failures
 
 def demo_usage():
     """演示科学音高记号法的使用方法"""
@@ -114,7 +135,12 @@ def demo_usage():
     print(f"   • 红色基线: 起始音符参考线")
 
 if __name__ == "__main__":
-    success = test_scientific_notation()
+    try:
+        test_scientific_notation()
+        success = True
+    except Exception as e:
+        print(f"❌ 测试失败: {e}")
+        success = False
     demo_usage()
     
     if success:
@@ -4,105 +4,167 @@
 测试时间范围功能
 """
 
+import os
+import sys
 import numpy as np
 import soundfile as sf
 from audio_pitch_analyzer import AudioPitchAnalyzer
 from audio_utils import AudioUtils
 
-def create_test_audio_with_segments():
-    """创建带有不同音调段落的测试音频"""
-    sr = 22050
-    segment_duration = 10  # 每段10秒
-    
-    # 创建三段不同音调的音频
-    segments = [
-        {"freq": 440, "note": "A4"},   # 0-10秒
-        {"freq": 523.25, "note": "C5"}, # 10-20秒  
-        {"freq": 659.25, "note": "E5"}, # 20-30秒
-    ]
+# 测试音频参数：三段不同音调，每段10秒
+SR = 22050
+SEGMENT_DURATION = 10
+SEGMENTS = [
+    {"freq": 440, "note": "A4"},   # 0-10秒
+    {"freq": 523.25, "note": "C5"}, # 10-20秒  
+    {"freq": 659.25, "note": "E5"}, # 20-30秒
+]
+
+def iter_segments_audio():
+    """
+    逐段生成带有不同音调段落的测试音频，依次产出每段的float32音频
     
-    print("创建测试音频文件...")
+    各段复用同一个缓冲区，使用方需在取下一段之前处理完当前段。
+    """
+    print("生成测试音频...")
     
-    # 生成完整音频
-    full_audio = []
-    for i, seg in enumerate(segments):
-        t = np.linspace(0, segment_duration, int(sr * segment_duration))
-        audio_seg = 0.3 * np.sin(2 * np.pi * seg["freq"] * t)
+    # 各段的时间轴和渐变曲线相同，只计算一次
+    seg_len = int(SR * SEGMENT_DURATION)
+    audio_seg = np.empty(seg_len, dtype=np.float32)
+    t = np.linspace(0, SEGMENT_DURATION, seg_len, dtype=np.float32)
+    fade_samples = int(SR * 0.5)  # 0.5秒渐变
+    fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
+    fade_out = fade_in[::-1]
+    for i, seg in enumerate(SEGMENTS):
+        np.multiply(np.float32(2 * np.pi * seg["freq"]), t, out=audio_seg)
+        np.sin(audio_seg, out=audio_seg)
+        audio_seg *= np.float32(0.3)
         
         # 添加渐变效果，避免突然的音调变化
-        fade_samples = int(sr * 0.5)  # 0.5秒渐变
         if i > 0:  # 不是第一段，添加淡入
-            audio_seg[:fade_samples] *= np.linspace(0, 1, fade_samples)
-        if i < len(segments) - 1:  # 不是最后一段，添加淡出
-            audio_seg[-fade_samples:] *= np.linspace(1, 0, fade_samples)
+            audio_seg[:fade_samples] *= fade_in
+        if i < len(SEGMENTS) - 1:  # 不是最后一段，添加淡出
+            audio_seg[-fade_samples:] *= fade_out
         
-        full_audio.extend(audio_seg)
-        print(f"段落 {i+1}: {seg['note']} ({seg['freq']} Hz) - {i*segment_duration}s 到 {(i+1)*segment_duration}s")
+        print(f"段落 {i+1}: {seg['note']} ({seg['freq']} Hz) - {i*SEGMENT_DURATION}s 到 {(i+1)*SEGMENT_DURATION}s")
+        yield audio_seg
     
-    # 保存音频文件
-    filename = "test_multi_segments.wav"
-    sf.write(filename, np.array(full_audio), sr)
-    print(f"\n创建测试文件: {filename} (总时长: {len(segments)*segment_duration}秒)")
+    print(f"\n总时长: {len(SEGMENTS)*SEGMENT_DURATION}秒")
+
+def synthesize_segments_audio():
+    """在内存中生成带有不同音调段落的测试音频，返回 (音频, 采样率)"""
+    # 预分配整段缓冲区，逐段复制到对应的切片
+    seg_len = int(SR * SEGMENT_DURATION)
+    full_audio = np.empty(seg_len * len(SEGMENTS), dtype=np.float32)
+    for i, audio_seg in enumerate(iter_segments_audio()):
+        full_audio[i * seg_len:(i + 1) * seg_len] = audio_seg
+    return full_audio, SR
+
+def create_test_audio_with_segments(filename="test_multi_segments.wav"):
+    """创建带有不同音调段落的测试音频文件（逐段写入，内存中只保留一段音频）"""
+    with sf.SoundFile(filename, 'w', samplerate=SR, channels=1, subtype='PCM_16') as f:
+        for audio_seg in iter_segments_audio():
+            f.write(audio_seg)
+    print(f"创建测试文件: {filename}")
     return filename
 
-def test_time_range_analysis():
-    """测试时间范围分析功能"""
-    print("=" * 60)
-    print("测试时间范围音调分析功能")
-    print("=" * 60)
+def slice_time_range(y, sr, start_time, end_time):
+    """与按文件加载时相同的截取方式：offset 处开始，读取 duration 秒"""
+    offset = AudioUtils.parse_time_string(start_time) if start_time else 0.0
+    first = int(offset * sr)
+    last = None
+    if end_time:
+        last = first + int((AudioUtils.parse_time_string(end_time) - offset) * sr)
+    return y[first:last]
+
+def test_time_range_analysis(multi_segment_wav, shared_analyzer):
+    """
+    测试时间范围分析功能
     
-    # 创建测试音频
-    test_file = create_test_audio_with_segments()
+    Args:
+        multi_segment_wav: 多段落测试音频文件路径（见 conftest.py）
+        shared_analyzer: 共用的音调分析器
+    """
+    # 输出先收集起来，最后一次性写出，避免每行都单独刷新stdout
+    lines = []
+    lines.append("=" * 60)
+    lines.append("测试时间范围音调分析功能")
+    lines.append("=" * 60)
+    
+    # 测试音频直接在内存中生成，各时间范围直接截取其中的采样
+    y, sr = synthesize_segments_audio()
     
-    # 初始化分析器
-    analyzer = AudioPitchAnalyzer()
+    analyzer = shared_analyzer
     
-    # 测试不同时间范围
+    # 测试不同时间范围（expected 为该范围内应检测到的音符）
     test_cases = [
         {"name": "完整音频", "start": None, "end": None},
-        {"name": "第一段 (0-10秒)", "start": "0", "end": "10"},
-        {"name": "第二段 (10-20秒)", "start": "10", "end": "20"},
-        {"name": "第三段 (20-30秒)", "start": "20", "end": "30"},
+        {"name": "第一段 (0-10秒)", "start": "0", "end": "10", "expected": "A4"},
+        {"name": "第二段 (10-20秒)", "start": "10", "end": "20", "expected": "C5"},
+        {"name": "第三段 (20-30秒)", "start": "20", "end": "30", "expected": "E5"},
         {"name": "前半部分 (0-15秒)", "start": "0", "end": "15"},
         {"name": "使用分:秒格式 (0:05-0:15)", "start": "0:05", "end": "0:15"},
     ]
     
     results = []
+    errors = []
     
     for test_case in test_cases:
-        print(f"\n{'='*40}")
-        print(f"测试: {test_case['name']}")
-        print(f"{'='*40}")
+        lines.append(f"\n{'='*40}")
+        lines.append(f"测试: {test_case['name']}")
+        lines.append(f"{'='*40}")
         
         try:
-            result = analyzer.analyze_pitch(
-                test_file, 
+            result = analyzer.analyze_pitch_array(
+                slice_time_range(y, sr, test_case['start'], test_case['end']), sr,
                 start_time=test_case['start'],
                 end_time=test_case['end']
             )
-            results.append((test_case['name'], result))
+            results.append((test_case, result))
             
             # 显示结果
             pitch = result['overall_pitch']
             time_range = result['time_range']
             
-            print(f"检测结果:")
-            print(f"  音调: {pitch['frequency']:.2f} Hz ({pitch['note']})")
-            print(f"  置信度: {pitch['confidence']:.2f}")
-            print(f"  实际分析时长: {time_range['actual_duration']:.2f}秒")
+            lines.append(f"检测结果:")
+            lines.append(f"  音调: {pitch['frequency']:.2f} Hz ({pitch['note']})")
+            lines.append(f"  置信度: {pitch['confidence']:.2f}")
+            lines.append(f"  实际分析时长: {time_range['actual_duration']:.2f}秒")
             
             if time_range['start_time'] or time_range['end_time']:
                 start = time_range['start_time'] or "开始"
                 end = time_range['end_time'] or "结束"
-                print(f"  时间范围: {start} - {end}")
+                lines.append(f"  时间范围: {start} - {end}")
             
         except Exception as e:
-            print(f"分析出错: {e}")
+            lines.append(f"分析出错: {e}")
+            errors.append((test_case['name'], e))
+    
+    # 额外检查：整段做一次逐帧音程分析，各段有声帧频率的中位数也应落在预期音符上
+    contour = analyzer.analyze_pitch_contour(multi_segment_wav, 0, len(y) / sr, frame_size=0.05)
+    frame_times = np.asarray(contour['analysis_data']['times'])
+    frame_freqs = np.asarray(contour['analysis_data']['frequencies'])
+    contour_notes = []
+    for test_case in test_cases:
+        if 'expected' not in test_case:
+            continue
+        start = AudioUtils.parse_time_string(test_case['start'])
+        end = AudioUtils.parse_time_string(test_case['end'])
+        voiced = (frame_times >= start) & (frame_times < end) & (frame_freqs > 0)
+        frequency = float(np.median(frame_freqs[voiced])) if voiced.any() else 0.0
+        contour_notes.append((test_case, analyzer.pitch_detector.frequency_to_note(frequency)))
+    
+    # 按文件加载时间范围的结果应与截取解码后的采样相同（WAV为16位量化，需按文件内容比较）
+    test_file = multi_segment_wav
+    file_result = analyzer.analyze_pitch(test_file, start_time="0:05", end_time="0:15")
+    y_file, _ = sf.read(test_file, dtype='float32', always_2d=False)
+    array_result = analyzer.analyze_pitch_array(slice_time_range(y_file, sr, "0:05", "0:15"), sr,
+                                                start_time="0:05", end_time="0:15")
     
     # 测试时间解析功能
-    print(f"\n{'='*40}")
-    print("测试时间解析功能")
-    print(f"{'='*40}")
+    lines.append(f"\n{'='*40}")
+    lines.append("测试时间解析功能")
+    lines.append(f"{'='*40}")
     
     time_test_cases = [
         "1:30",     # 1分30秒
@@ -116,19 +178,28 @@ def test_time_range_analysis():
         try:
             seconds = AudioUtils.parse_time_string(time_str)
             formatted = AudioUtils.format_time(seconds)
-            print(f"  {time_str} -> {seconds}秒 -> {formatted}")
+            lines.append(f"  {time_str} -> {seconds}秒 -> {formatted}")
         except Exception as e:
-            print(f"  {time_str} -> 解析错误: {e}")
+            lines.append(f"  {time_str} -> 解析错误: {e}")
     
-    # 清理测试文件
-    import os
-    try:
-        os.remove(test_file)
-        print(f"\n清理测试文件: {test_file}")
-    except:
-        pass
+    lines.append("\n时间范围分析测试完成！")
+    sys.stdout.write("\n".join(lines) + "\n")
     
-    print("\n时间范围分析测试完成！")
+    assert not errors, errors
+    assert file_result['overall_pitch'] == array_result['overall_pitch']
+    assert file_result['time_range'] == array_result['time_range']
+    for test_case, result in results:
+        if 'expected' in test_case:
+            note = result['overall_pitch']['note']
+            assert note == test_case['expected'], f"{test_case['name']}: {note}"
+    for test_case, note in contour_notes:
+        assert note == test_case['expected'], f"{test_case['name']} (音程分析): {note}"
 
 if __name__ == "__main__":
-    test_time_range_analysis()
+    test_file = create_test_audio_with_segments()
+    try:
+        test_time_range_analysis(test_file, AudioPitchAnalyzer())
+    finally:
+        # 清理测试文件
+        os.remove(test_file)
+        print(f"\n清理测试文件: {test_file}")